@@ -0,0 +1,153 @@
+"""Quote a batch of swaps through Jupiter, without Streamlit
+
+Usage: python batch_quote.py quotes.csv [--output quotes.jsonl] [--concurrency 32]
+                             [--slippage-bps 50] [--format csv|jsonl] [--include-quote]
+
+Each input row needs input_mint, output_mint and amount (in the input token's
+base units); an optional slippage_bps overrides --slippage-bps for that row and
+an optional id is copied to the output. Symbols from TOKEN_MINTS (SOL, USDC,
+USDT) are accepted in place of mint addresses. Pass "-" to read stdin.
+
+Rows are read lazily and at most --concurrency quotes are in flight, so memory
+stays flat however large the file is. Each result is written as one JSON line
+as soon as it completes: output order follows completion, and ``row`` is the
+1-based input row. A summary goes to stderr.
+
+Configuration comes from the environment, using the keys in
+jupy_core.DEFAULT_CONFIG (JUPITER_API_BASE, HTTP_MAX_RETRIES, ...). Throughput
+is capped by JUPITER_RATE_LIMIT requests per second; rows wait for the
+limiter instead of being shed.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from jupy_core import (
+    DEFAULT_SLIPPAGE_BPS,
+    TOKEN_MINTS,
+    AsyncJupiterAPI,
+    JupiterAPI,
+    get_config,
+    set_config_source,
+)
+
+def read_rows(path: str, fmt: str):
+    """Yield input rows one at a time; JSONL lines that fail to parse are yielded as exceptions"""
+    with (nullcontext(sys.stdin) if path == "-" else open(path, newline="")) as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield e
+
+def parse_request(row, default_slippage_bps: int) -> tuple:
+    """(input_mint, output_mint, amount, slippage_bps) from an input row"""
+    if isinstance(row, Exception):
+        raise ValueError(row)
+    input_mint = row["input_mint"].strip()
+    output_mint = row["output_mint"].strip()
+    amount = int(row["amount"])
+    if amount <= 0:
+        raise ValueError("amount must be positive")
+    slippage_bps = int(row.get("slippage_bps") or default_slippage_bps)
+    return TOKEN_MINTS.get(input_mint, input_mint), TOKEN_MINTS.get(output_mint, output_mint), amount, slippage_bps
+
+async def quote_row(api: AsyncJupiterAPI, row_number: int, row, default_slippage_bps: int,
+                    include_quote: bool) -> dict:
+    record = {"row": row_number}
+    if isinstance(row, dict) and row.get("id") not in (None, ""):
+        record["id"] = row["id"]
+    try:
+        input_mint, output_mint, amount, slippage_bps = parse_request(row, default_slippage_bps)
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        record["error"] = f"invalid row: {e!r}"
+        return record
+    record.update(input_mint=input_mint, output_mint=output_mint, amount=amount, slippage_bps=slippage_bps)
+
+    started = time.perf_counter()
+    quote = await api.get_swap_quote(input_mint, output_mint, amount, slippage_bps)
+    record["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    if not quote:
+        record["error"] = "quote failed"
+        return record
+    # in_amount can differ from amount: quotes are shared across nearby amounts
+    # (QUOTE_AMOUNT_BUCKET_BPS), so rates should be taken from in/out
+    record["in_amount"] = int(quote.get("inAmount", amount))
+    record["out_amount"] = int(quote.get("outAmount", 0))
+    record["price_impact_pct"] = float(quote.get("priceImpactPct") or 0.0)
+    if include_quote:
+        record["quote"] = quote
+    return record
+
+async def quote_stream(rows, out, concurrency: int, default_slippage_bps: int, include_quote: bool) -> dict:
+    """Quote rows with at most ``concurrency`` in flight, writing each result as it completes"""
+    loop = asyncio.get_running_loop()
+    # Quotes are blocking HTTP calls run via asyncio.to_thread; one thread per in-flight quote
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    api = AsyncJupiterAPI(JupiterAPI(), max_concurrency=concurrency)
+    summary = {"rows": 0, "quoted": 0, "failed": 0}
+
+    def write(done):
+        for task in done:
+            record = task.result()
+            summary["failed" if "error" in record else "quoted"] += 1
+            out.write(json.dumps(record) + "\n")
+
+    pending = set()
+    for row_number, row in enumerate(rows, 1):
+        if len(pending) >= concurrency:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            write(done)
+        pending.add(asyncio.create_task(quote_row(api, row_number, row, default_slippage_bps, include_quote)))
+        summary["rows"] = row_number
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        write(done)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help='CSV or JSONL file of quote requests, or "-" for stdin')
+    parser.add_argument("--output", help="JSONL file to write (default: stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"),
+                        help="Input format (default: from the file extension, jsonl for stdin)")
+    parser.add_argument("--concurrency", type=int, help="Quotes in flight (default: ASYNC_MAX_CONCURRENCY)")
+    parser.add_argument("--slippage-bps", type=int, default=DEFAULT_SLIPPAGE_BPS)
+    parser.add_argument("--include-quote", action="store_true", help="Include the full Jupiter quote in each line")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    # Retries are expected under load; only final failures are worth a line
+    logging.getLogger("urllib3").setLevel(logging.ERROR)
+    concurrency = args.concurrency or get_config()['ASYNC_MAX_CONCURRENCY']
+    if concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    # Keep one pooled connection per in-flight quote instead of discarding extras,
+    # and let every row wait its turn at the rate limiter: a batch has no UI to protect
+    pool_size = max(get_config()['JUPITER_POOL_SIZE'], concurrency)
+    set_config_source(dict(os.environ, JUPITER_POOL_SIZE=str(pool_size), RATE_LIMIT_MAX_WAIT="86400"))
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    started = time.perf_counter()
+    with (open(args.output, "w") if args.output else nullcontext(sys.stdout)) as out:
+        summary = asyncio.run(quote_stream(read_rows(args.input, fmt), out, concurrency,
+                                           args.slippage_bps, args.include_quote))
+    elapsed = time.perf_counter() - started
+    summary.update(elapsed_s=round(elapsed, 2), rows_per_s=round(summary["rows"] / max(elapsed, 1e-9), 1))
+    print(json.dumps(summary), file=sys.stderr)
+    return 1 if summary["failed"] and not summary["quoted"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Throughput and memory benchmark for streaming achievement evaluation
+
+Usage: python benchmarks/bench_achievements.py [--events 1000000] [--players 10000]
+                                               [--log events.jsonl] [--replay events.jsonl]
+
+Generates a synthetic game event stream (matches, races, treasures, daily
+guild leadership, trades) for --players players and feeds it through
+jupy_core.AchievementEngine three ways:
+
+    process   in-memory batches passed to AchievementEngine.process
+    queue     AchievementEngine.submit with the background consumer running
+    replay    AchievementEngine.replay over the same events written as JSONL
+
+and reports events per second for each, unlocks, and traced memory per player.
+--log keeps the generated JSONL instead of a temp file; --replay skips
+generation and only replays an existing log. Prints one JSON object.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jupy_core import AchievementEngine
+
+# (event type, share of the stream)
+EVENT_MIX = (("match_won", 0.3), ("race_completed", 0.3), ("treasure_found", 0.25),
+             ("guild_led", 0.05), ("item_traded", 0.1))
+
+def generate_events(rng: random.Random, count: int, players: int, start: float):
+    types, weights = zip(*EVENT_MIX)
+    # Spread the stream over 60 days so daily rules can be met
+    step = 60 * 86400 / max(count, 1)
+    for i in range(count):
+        event = {"player": f"player{rng.randrange(players):06d}", "type": rng.choices(types, weights)[0],
+                 "ts": round(start + i * step, 3)}
+        if event["type"] == "race_completed":
+            event["duration_s"] = rng.randint(60, 240)
+        yield event
+
+def timed(run, events: int) -> dict:
+    started = time.perf_counter()
+    engine = run()
+    elapsed = time.perf_counter() - started
+    return {"elapsed_s": round(elapsed, 3), "events_per_s": round(events / max(elapsed, 1e-9)),
+            **engine.stats()}
+
+def run_process(events: list) -> AchievementEngine:
+    engine = AchievementEngine()
+    for i in range(0, len(events), 10000):
+        engine.process(events[i:i + 10000])
+    return engine
+
+def run_queue(events: list) -> AchievementEngine:
+    engine = AchievementEngine(poll_interval=0.01).start()
+    for event in events:
+        engine.submit(event)
+    while engine.events < len(events):
+        time.sleep(0.005)
+    engine.stop()
+    return engine
+
+def run_replay(path: str) -> AchievementEngine:
+    engine = AchievementEngine(event_log=path)
+    engine.replay()
+    return engine
+
+def memory_per_player(events: list) -> float:
+    """Traced bytes of engine state per tracked player"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    engine = run_process(events)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return round(used / max(len(engine.players), 1), 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--log", help="Write the generated events to this JSONL file and keep it")
+    parser.add_argument("--replay", help="Only replay this existing JSONL event log")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay, "rb") as f:
+            lines = sum(1 for _ in f)
+        print(json.dumps({"benchmark": "achievements", "replay": timed(lambda: run_replay(args.replay), lines)},
+                         indent=2))
+        return
+
+    rng = random.Random(args.seed)
+    events = list(generate_events(rng, args.events, args.players, time.time() - 60 * 86400))
+    path = args.log or tempfile.mkstemp(prefix="jupy-events-", suffix=".jsonl")[1]
+    with open(path, "w") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+    results = {
+        "process": timed(lambda: run_process(events), len(events)),
+        "queue": timed(lambda: run_queue(events), len(events)),
+        "replay": timed(lambda: run_replay(path), len(events)),
+    }
+    if not args.log:
+        os.remove(path)
+
+    print(json.dumps({
+        "benchmark": "achievements",
+        "config": vars(args),
+        **results,
+        "bytes_per_player": memory_per_player(events[:min(len(events), 200_000)]),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Headless load benchmark for the Streamlit app against a local stub upstream
+
+Usage: python benchmarks/bench_app.py [--items 100000] [--ledger-rows 100000]
+                                      [--iterations 20] [--sessions 5]
+                                      [--latency-ms 50] [--error-rate 0.0]
+                                      [--output results.json]
+
+Starts benchmarks/stub_server.py in-process, writes a scaled item catalog and
+treasury ledger to a temp directory, points get_config at them through
+Streamlit secrets and drives jup.py with streamlit.testing's AppTest. For each
+view it switches the app's navigation to that view, then repeats one
+representative interaction and records rerun latency percentiles and upstream
+calls per rerun. It also reports mean render time
+per tab (from the app's own metrics dump), per-session RSS and peak RSS.
+Prints one JSON object (and writes it to --output if given) so results can be
+tracked across versions.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+APP_PATH = os.path.join(REPO_DIR, "jup.py")
+sys.path.insert(0, BENCH_DIR)
+
+from stub_server import StubUpstream
+
+GUILD_NAME = "Crypto Warriors"
+GAMES = ["Fantasy RPG", "Battle Arena", "Racing World", "Space Sim"]
+RARITIES = ["Common", "Rare", "Epic", "Legendary"]
+
+def write_catalog(path: str, count: int, mints: int = 50, seed: int = 0):
+    rng = random.Random(seed)
+    mint_ids = [f"BenchMint{i:035d}" for i in range(mints)]
+    with open(path, "w") as f:
+        for i in range(count):
+            f.write(json.dumps({
+                "id": f"item_{i:07d}",
+                "name": f"Item {i}",
+                "rarity": rng.choice(RARITIES),
+                "token_mint": rng.choice(mint_ids),
+                "price_sol": round(rng.uniform(0.01, 10), 3),
+                "description": "Benchmark item",
+                "game": rng.choice(GAMES),
+            }) + "\n")
+
+def _prefill_ledger(path: str, count: int, seed: int):
+    # Runs in a spawned process so importing jupy_core here cannot seed the
+    # benchmark process's shared config with default (non-stub) values
+    sys.path.insert(0, REPO_DIR)
+    from jupy_core import TreasuryLedger
+
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    ledger = TreasuryLedger(path)
+    batch = []
+    for i in range(count):
+        deposit = rng.random() < 0.7
+        timestamp = (start + timedelta(seconds=i * 365 * 86400 / max(count, 1))).strftime("%Y-%m-%d %H:%M:%S")
+        batch.append(("Deposit" if deposit else "Withdrawal", round(rng.uniform(0.1, 5), 2),
+                      f"BenchWallet{rng.randrange(500):05d}", "" if deposit else "Benchmark", timestamp))
+        if len(batch) == 50000:
+            ledger.import_rows(GUILD_NAME, batch)
+            batch = []
+    if batch:
+        ledger.import_rows(GUILD_NAME, batch)
+
+def prefill_ledger(path: str, count: int, seed: int = 0):
+    process = multiprocessing.get_context("spawn").Process(target=_prefill_ledger, args=(path, count, seed))
+    process.start()
+    process.join()
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+def find(elements, predicate):
+    for element in elements:
+        if predicate(element):
+            return element
+    raise LookupError("Widget not found")
+
+def start_session(secrets: dict, wallet: str, timeout: float):
+    """Open a session and connect its wallet; returns (AppTest, cold start ms, connect ms)"""
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.secrets.update(secrets)
+    started = time.perf_counter()
+    at.run()
+    cold_ms = (time.perf_counter() - started) * 1000
+    at.session_state["wallet_address"] = wallet
+    started = time.perf_counter()
+    find(at.sidebar.button, lambda button: button.label == "Connect Wallet").click().run()
+    connect_ms = (time.perf_counter() - started) * 1000
+    return at, cold_ms, connect_ms
+
+# Navigation label of each view in jup.py's VIEWS
+VIEW_LABELS = {
+    "marketplace": "🛒 Item Marketplace",
+    "achievements": "🏆 Achievements",
+    "play_to_earn": "💰 Play-to-Earn",
+    "treasury": "🏛️ Guild Treasury",
+    "analytics": "📈 Trading Analytics",
+}
+
+# One representative interaction per view; each schedules the widget change
+# that the following at.run() applies
+INTERACTIONS = {
+    "marketplace": lambda at, i: find(at.number_input, lambda w: w.label.startswith("Page (of")).set_value(1 + i % 2),
+    "achievements": lambda at, i: find(at.button, lambda w: (w.key or "").startswith("claim_")).click(),
+    "play_to_earn": lambda at, i: find(at.button, lambda w: w.label.endswith("GAME Tokens")).click(),
+    "treasury": lambda at, i: find(at.button, lambda w: w.label == "Deposit to Treasury").click(),
+    "analytics": lambda at, i: find(at.radio, lambda w: w.label == "Range").set_value(["1H", "24H", "7D"][i % 3]),
+}
+
+def percentiles(samples: list) -> dict:
+    values = np.asarray(samples, dtype=np.float64)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p90_ms": round(float(np.percentile(values, 90)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+def tab_render_means(metrics_path: str) -> dict:
+    """Mean render time per tab from the app's Prometheus dump"""
+    sums, counts = {}, {}
+    try:
+        with open(metrics_path) as f:
+            for line in f:
+                match = re.match(r'jupy_tab_render_seconds_(sum|count)\{tab="([^"]+)"\} (\S+)', line)
+                if match:
+                    kind, tab, value = match.groups()
+                    (sums if kind == "sum" else counts)[tab] = float(value)
+    except OSError:
+        return {}
+    return {tab: round(sums[tab] / counts[tab] * 1000, 2) for tab in sorted(counts) if counts[tab]}
+
+def git_version() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def write_event_log(path: str, wallet: str):
+    """Game events that unlock the achievements the benchmark claims"""
+    with open(path, "w") as f:
+        f.write(json.dumps({"player": wallet, "type": "match_won"}) + "\n")
+        for _ in range(50):
+            f.write(json.dumps({"player": wallet, "type": "treasure_found"}) + "\n")
+
+BENCH_WALLET = "BenchWallet00000ConnectedSessionAddr"
+
+def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="jupy-bench-")
+    catalog_path = os.path.join(workdir, "catalog.jsonl")
+    ledger_path = os.path.join(workdir, "treasury.db")
+    write_catalog(catalog_path, args.items)
+    prefill_ledger(ledger_path, args.ledger_rows)
+    events_path = os.path.join(workdir, "events.jsonl")
+    write_event_log(events_path, BENCH_WALLET)
+
+    stub = StubUpstream(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, wallet_assets=args.wallet_assets).start()
+    metrics_path = os.path.join(workdir, "metrics.prom")
+    secrets = {
+        **stub.secrets(),
+        "ITEM_CATALOG_PATH": catalog_path,
+        "TREASURY_DB_PATH": ledger_path,
+        "ACHIEVEMENT_EVENT_LOG": events_path,
+        "METRICS_ENABLED": True,
+        "METRICS_FILE": metrics_path,
+        "METRICS_DUMP_INTERVAL": 0.2,
+    }
+
+    baseline_rss = current_rss_mb()
+    at, cold_ms, connect_ms = start_session(secrets, BENCH_WALLET, args.timeout)
+
+    interactions = {}
+    for tab, interact in INTERACTIONS.items():
+        started = time.perf_counter()
+        at.radio(key="active_view").set_value(VIEW_LABELS[tab]).run()
+        switch_ms = (time.perf_counter() - started) * 1000
+        latencies, calls, errors = [], {}, 0
+        for i in range(args.iterations):
+            try:
+                interact(at, i)
+            except LookupError:
+                errors += 1
+                continue
+            before = stub.call_counts()
+            started = time.perf_counter()
+            at.run()
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += len(at.exception)
+            for endpoint, count in stub.call_counts().items():
+                calls[endpoint] = calls.get(endpoint, 0) + count - before.get(endpoint, 0)
+        interactions[tab] = {
+            **(percentiles(latencies) if latencies else {}),
+            "switch_ms": round(switch_ms, 2),
+            "reruns": len(latencies),
+            "errors": errors,
+            "upstream_calls_per_rerun": {
+                endpoint: round(count / max(len(latencies), 1), 3) for endpoint, count in sorted(calls.items())
+            },
+        }
+
+    # Memory per additional concurrent session
+    rss_before_sessions = current_rss_mb()
+    sessions = [
+        start_session(secrets, f"BenchWallet{i:05d}SessionAddress000000", args.timeout)[0]
+        for i in range(args.sessions)
+    ]
+    rss_per_session = (current_rss_mb() - rss_before_sessions) / max(len(sessions), 1)
+
+    stub.stop()
+    time.sleep(0.5)  # let the metrics dumper write a final snapshot
+    return {
+        "benchmark": "app",
+        "version": git_version(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "items": args.items,
+            "ledger_rows": args.ledger_rows,
+            "iterations": args.iterations,
+            "sessions": args.sessions,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "wallet_assets": args.wallet_assets,
+        },
+        "cold_start_ms": round(cold_ms, 2),
+        "connect_ms": round(connect_ms, 2),
+        "interactions": interactions,
+        "tab_render_mean_ms": tab_render_means(metrics_path),
+        "upstream_calls_total": stub.call_counts(),
+        "baseline_rss_mb": round(baseline_rss, 1),
+        "rss_per_session_mb": round(rss_per_session, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--ledger-rows", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--wallet-assets", type=int, default=2500)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-rerun timeout in seconds")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    result = run(args)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Per-item memory footprint of the catalog records, before and after the compact layout
+
+Usage: python benchmarks/bench_memory.py [--items 1000000]
+
+Rows are built the way a catalog loader builds them: every field is a fresh
+string per row. "before" keeps them in a plain @dataclass (the original
+layout), "after" uses jupy_core.GameItem (slotted, frozen, interned categoricals).
+Prints one JSON object.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jupy_core import GameItem
+
+GAMES = ["Fantasy RPG", "Battle Arena", "Racing World", "Space Sim"]
+RARITIES = ["Common", "Rare", "Epic", "Legendary"]
+MINTS = [f"Mint{i:040d}" for i in range(50)]
+
+@dataclass
+class PlainGameItem:
+    id: str
+    name: str
+    rarity: str
+    token_mint: str
+    price_sol: float
+    description: str
+    game: str
+
+def fresh(value: str) -> str:
+    # Force a new string object, as json.loads/csv would produce per row
+    return "".join(list(value))
+
+def build(record_type, count: int) -> list:
+    return [
+        record_type(
+            f"item_{i:07d}",
+            f"Item {i}",
+            fresh(RARITIES[i % len(RARITIES)]),
+            fresh(MINTS[i % len(MINTS)]),
+            (i % 1000) / 100,
+            fresh("A catalog item"),
+            fresh(GAMES[i % len(GAMES)]),
+        )
+        for i in range(count)
+    ]
+
+def measure(record_type, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    items = build(record_type, count)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return current / count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    before = measure(PlainGameItem, args.items)
+    after = measure(GameItem, args.items)
+    print(json.dumps({
+        "benchmark": "game_item_memory",
+        "items": args.items,
+        "before_bytes_per_item": round(before, 1),
+        "after_bytes_per_item": round(after, 1),
+        "reduction": round(1 - after / before, 3),
+    }))
+
+if __name__ == "__main__":
+    main()
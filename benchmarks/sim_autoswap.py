@@ -0,0 +1,141 @@
+"""Simulate batched Play-to-Earn auto-swaps against the local stub upstream
+
+Usage: python benchmarks/sim_autoswap.py [--players 5000] [--windows 6] [--claim-rate 0.3]
+                                         [--reverse-share 0.05] [--latency-ms 20]
+                                         [--fee-lamports 5000] [--impact-depth 1e14]
+
+Each batch window, a --claim-rate share of players claims 1-20 GAME, SPEED or
+TREASURE and auto-swaps it to SOL or USDC; a --reverse-share of orders go the
+other way (SOL into game tokens) so netting has something to cross. The same
+orders are executed twice against benchmarks/stub_server.py:
+
+    batched     jupy_core.AutoSwapEngine, one flush per window
+    individual  one Jupiter quote (and one on-chain swap) per order
+
+and the runs are compared on upstream quote calls, swaps executed and value
+delivered. Value is measured at the stub's reference prices; each executed swap
+is charged --fee-lamports of SOL as its network fee. Prints one JSON object.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from jupy_core import (
+    GAME_TOKEN_MINTS,
+    TOKEN_DECIMALS,
+    TOKEN_MINTS,
+    AutoSwapEngine,
+    JupiterAPI,
+    set_config_source,
+)
+from stub_server import StubUpstream, stable_price
+
+def generate_orders(rng: random.Random, players: int, claim_rate: float, reverse_share: float) -> list:
+    """(player, input_mint, output_mint, amount) for one batch window"""
+    orders = []
+    game_mints = list(GAME_TOKEN_MINTS.values())
+    for player in range(players):
+        if rng.random() >= claim_rate:
+            continue
+        game_mint = rng.choice(game_mints)
+        if rng.random() < reverse_share:
+            # 0.001-0.05 SOL into a game token
+            orders.append((f"player{player}", TOKEN_MINTS["SOL"], game_mint, rng.randint(1, 50) * 10 ** 6))
+        else:
+            target = rng.choice((TOKEN_MINTS["SOL"], TOKEN_MINTS["USDC"]))
+            orders.append((f"player{player}", game_mint, target, rng.randint(1, 20) * 10 ** TOKEN_DECIMALS[game_mint]))
+    return orders
+
+def value(mint: str, amount: int) -> float:
+    """Value of a base-unit amount at the stub's reference price"""
+    return amount / 10 ** TOKEN_DECIMALS[mint] * stable_price(mint)
+
+def run_batched(windows: list) -> dict:
+    engine = AutoSwapEngine(JupiterAPI())
+    value_out, swaps, requeued = 0.0, 0, 0
+    for orders in windows:
+        for order in orders:
+            engine.submit(*order)
+        batch = engine.flush()
+        swaps += sum(1 for pair in batch.pairs if pair.swapped_in)
+        requeued += batch.requeued
+        value_out += sum(value(allocation.output_mint, allocation.amount_out) for allocation in batch.allocations)
+    return {"value_out": value_out, "swaps": swaps, "requeued_orders": requeued}
+
+def run_individual(windows: list, concurrency: int) -> dict:
+    api = JupiterAPI()
+
+    def execute(order):
+        _, input_mint, output_mint, amount = order
+        quote = api.get_swap_quote(input_mint, output_mint, amount)
+        return value(output_mint, int(quote['outAmount'])) if quote else None
+
+    value_out, swaps, failed = 0.0, 0, 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for orders in windows:
+            for result in pool.map(execute, orders):
+                if result is None:
+                    failed += 1
+                else:
+                    value_out += result
+                    swaps += 1
+    return {"value_out": value_out, "swaps": swaps, "failed_orders": failed}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--windows", type=int, default=6)
+    parser.add_argument("--claim-rate", type=float, default=0.3)
+    parser.add_argument("--reverse-share", type=float, default=0.05)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--fee-lamports", type=int, default=5000, help="Network fee charged per executed swap")
+    parser.add_argument("--impact-depth", type=float, default=1e14,
+                        help="Stub input size (base units) at which price impact reaches 100%%")
+    parser.add_argument("--concurrency", type=int, default=32, help="Quotes in flight for the individual run")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stub = StubUpstream(latency_ms=args.latency_ms, decimals=TOKEN_DECIMALS, impact_depth=args.impact_depth).start()
+    # No client-side rate limit: the stub is local and both runs should be bounded by work, not policy
+    set_config_source({**stub.secrets(), "JUPITER_RATE_LIMIT": 0.0, "HELIUS_RATE_LIMIT": 0.0,
+                       "JUPITER_POOL_SIZE": args.concurrency})
+
+    rng = random.Random(args.seed)
+    windows = [generate_orders(rng, args.players, args.claim_rate, args.reverse_share) for _ in range(args.windows)]
+    value_in = sum(value(order[1], order[3]) for orders in windows for order in orders)
+    fee = args.fee_lamports / 10 ** TOKEN_DECIMALS[TOKEN_MINTS["SOL"]] * stable_price(TOKEN_MINTS["SOL"])
+
+    results = {}
+    for name, run in (("batched", lambda: run_batched(windows)),
+                      ("individual", lambda: run_individual(windows, args.concurrency))):
+        before = stub.call_counts().get("jupiter_quote", 0)
+        started = time.perf_counter()
+        result = run()
+        result["elapsed_s"] = round(time.perf_counter() - started, 2)
+        result["quote_calls"] = stub.call_counts().get("jupiter_quote", 0) - before
+        result["fees"] = result["swaps"] * fee
+        result["net_value_out"] = result["value_out"] - result["fees"]
+        result["efficiency"] = round(result["net_value_out"] / value_in, 6) if value_in else None
+        for key in ("value_out", "fees", "net_value_out"):
+            result[key] = round(result[key], 4)
+        results[name] = result
+    stub.stop()
+
+    print(json.dumps({
+        "benchmark": "auto_swap",
+        "config": vars(args),
+        "orders": sum(len(orders) for orders in windows),
+        "value_in": round(value_in, 4),
+        **results,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Stress the guild treasury with many concurrent members and check its invariants
+
+Usage: python benchmarks/stress_treasury.py [--threads 64] [--ops 200] [--withdraw-share 0.45]
+                                           [--duplicate-share 0.1] [--db treasury.db]
+
+Every thread is a guild member hammering one guild through its own
+GuildTreasury (as separate Streamlit sessions would) with random deposits and
+withdrawals, each carrying an idempotency key. A --duplicate-share of
+operations are resubmitted with the same key from another thread at the same
+time, like a double-clicked rerun. Afterwards it checks:
+
+    balance     final balance == sum of applied entries == ledger replay
+    floor       replaying the ledger in commit order never goes below zero
+    once        every idempotency key produced at most one ledger row, and
+                duplicates reported the original row
+    count       the running tx_count matches the ledger row count
+
+and reports throughput and the mean group-commit size. Prints one JSON object
+and exits non-zero if any invariant fails.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jupy_core import GuildTreasury, TreasuryLedger
+
+GUILD_NAME = "Stress Guild"
+EPSILON = 1e-6
+
+def member(ledger: TreasuryLedger, index: int, args, barrier: threading.Barrier, duplicates: list,
+           outcomes: list):
+    rng = random.Random(args.seed * 1000 + index)
+    guild = GuildTreasury(ledger)
+    guild.guild_name = GUILD_NAME
+    wallet = f"StressMember{index:04d}"
+    barrier.wait()
+    for op in range(args.ops):
+        key = f"{wallet}:{op}"
+        amount = round(rng.uniform(0.01, 2.0), 2)
+        withdraw = rng.random() < args.withdraw_share
+        operation = (guild.withdraw_from_treasury, (amount, wallet, "Stress"), -amount) if withdraw \
+            else (guild.deposit_to_treasury, (amount, wallet), amount)
+        if rng.random() < args.duplicate_share:
+            # Another session replays the same click while this one is applying it
+            duplicates.append((key, operation))
+        outcomes.append((key, operation[2], operation[0](*operation[1], idempotency_key=key)))
+
+def resubmitter(duplicates: list, outcomes: list, done: threading.Event):
+    while not done.is_set() or duplicates:
+        try:
+            key, (call, call_args, signed) = duplicates.pop()
+        except IndexError:
+            time.sleep(0.0005)
+            continue
+        outcomes.append((key, signed, call(*call_args, idempotency_key=key)))
+
+def check(path: str, outcomes: list) -> dict:
+    conn = sqlite3.connect(path)
+    balance, tx_count = conn.execute("SELECT balance, tx_count FROM balances WHERE guild = ?",
+                                     (GUILD_NAME,)).fetchone()
+    rows = conn.execute("SELECT id, type, amount FROM ledger WHERE guild = ? ORDER BY id",
+                        (GUILD_NAME,)).fetchall()
+    key_rows = dict(conn.execute("SELECT key, ledger_id FROM idempotency_keys WHERE guild = ?", (GUILD_NAME,)))
+    conn.close()
+
+    running, lowest = 0.0, 0.0
+    for _, tx_type, amount in rows:
+        running += amount if tx_type == "Deposit" else -amount
+        lowest = min(lowest, running)
+
+    applied = {}
+    duplicate_mismatch = 0
+    for key, signed, result in outcomes:
+        if result.row_id is None or result.duplicate:
+            continue
+        if key in applied:
+            duplicate_mismatch += 1  # the same key was applied twice
+        applied[key] = (signed, result.row_id)
+    for key, signed, result in outcomes:
+        if result.duplicate and applied.get(key, (None, None))[1] != result.row_id:
+            duplicate_mismatch += 1
+    expected = sum(signed for signed, _ in applied.values())
+
+    return {
+        "balance": abs(balance - expected) < EPSILON and abs(balance - running) < EPSILON,
+        "floor": lowest >= -EPSILON,
+        "once": duplicate_mismatch == 0 and len(key_rows) == len(applied) == len(rows)
+                and all(key_rows.get(key) == row_id for key, (_, row_id) in applied.items()),
+        "count": tx_count == len(rows),
+        "final_balance": round(balance, 6),
+        "ledger_rows": len(rows),
+        "lowest_running_balance": round(lowest, 6),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--ops", type=int, default=200, help="Operations per thread")
+    parser.add_argument("--withdraw-share", type=float, default=0.45)
+    parser.add_argument("--duplicate-share", type=float, default=0.1)
+    parser.add_argument("--resubmitters", type=int, default=4, help="Threads replaying duplicate clicks")
+    parser.add_argument("--db", help="SQLite file to use (default: a fresh temp file)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="jupy-stress-"), "treasury.db")
+    ledger = TreasuryLedger(path)
+    barrier = threading.Barrier(args.threads)
+    duplicates, outcomes, done = [], [], threading.Event()
+    members = [threading.Thread(target=member, args=(ledger, i, args, barrier, duplicates, outcomes))
+               for i in range(args.threads)]
+    replayers = [threading.Thread(target=resubmitter, args=(duplicates, outcomes, done))
+                 for _ in range(args.resubmitters)]
+
+    started = time.perf_counter()
+    for thread in members + replayers:
+        thread.start()
+    for thread in members:
+        thread.join()
+    done.set()
+    for thread in replayers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    invariants = check(path, outcomes)
+    stats = ledger.stats()
+    result = {
+        "benchmark": "treasury_stress",
+        "config": vars(args),
+        "operations": len(outcomes),
+        "applied": sum(1 for *_, r in outcomes if r.row_id is not None and not r.duplicate),
+        "refused": sum(1 for *_, r in outcomes if r.row_id is None),
+        "duplicates": sum(1 for *_, r in outcomes if r.duplicate),
+        "elapsed_s": round(elapsed, 3),
+        "ops_per_s": round(len(outcomes) / max(elapsed, 1e-9)),
+        "commits": stats["commits"],
+        "mean_group_size": round(stats["entries"] / max(stats["commits"], 1), 2),
+        "invariants": invariants,
+    }
+    print(json.dumps(result, indent=2))
+    return 0 if all(invariants[name] for name in ("balance", "floor", "once", "count")) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
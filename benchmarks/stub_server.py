@@ -0,0 +1,208 @@
+"""Local fake Jupiter and Helius server for offline benchmarks
+
+Usage: python benchmarks/stub_server.py [--port 8899] [--latency-ms 50] [--error-rate 0.01]
+
+Serves the endpoints the jupy_core clients call:
+    GET  /v6/price?ids=a,b,c                  Jupiter prices
+    GET  /v6/quote?inputMint=..&amount=..     Jupiter swap quotes
+    GET  /v0/addresses/{wallet}/balances      Helius balances
+    POST /                                    Helius DAS getAssetsByOwner (paginated)
+
+Every response waits ``latency_ms`` (plus up to ``jitter_ms``) and fails with a
+503 at ``error_rate``. Calls are counted per endpoint so a harness can report
+upstream calls per rerun.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+def stable_price(mint: str) -> float:
+    """Deterministic per-mint base price so runs are comparable"""
+    digest = hashlib.sha256(mint.encode()).digest()
+    return 0.01 + int.from_bytes(digest[:4], "big") / 2 ** 32 * 200
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Accept backlog sized for concurrent load clients rather than the default 5
+    request_queue_size = 128
+
+class StubUpstream:
+    """Threaded HTTP server standing in for Jupiter and Helius"""
+
+    def __init__(self, port: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, wallet_assets: int = 50, seed: int = 0,
+                 decimals: dict = None, impact_depth: float = 1e12):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.wallet_assets = wallet_assets
+        # Per-mint decimals; when given, quotes price whole tokens at stable_price
+        # (consistent with /price) instead of treating base units as equal value
+        self.decimals = decimals or {}
+        # Input amount (base units) at which price impact reaches 100%, capped at 50%
+        self.impact_depth = impact_depth
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self.server = StubHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-upstream", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def secrets(self) -> dict:
+        """Streamlit secrets that point get_config at this server"""
+        return {
+            "JUPITER_API_BASE": f"{self.base_url}/v6",
+            "HELIUS_API_BASE": f"{self.base_url}/v0",
+            "HELIUS_RPC_URL": self.base_url,
+            "HELIUS_API_KEY": "stub",
+        }
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def call_counts(self) -> dict:
+        with self._lock:
+            return dict(self.calls)
+
+    def _delay_and_maybe_fail(self) -> bool:
+        with self._lock:
+            delay = self.latency_ms + self.random.random() * self.jitter_ms
+            failed = self.random.random() < self.error_rate
+        if delay:
+            time.sleep(delay / 1000)
+        return failed
+
+    def price(self, query: dict) -> dict:
+        ids = query.get("ids", [""])[0].split(",")
+        # Small random walk around a stable base so charts have something to show
+        with self._lock:
+            return {"data": {
+                mint: {"id": mint, "price": round(stable_price(mint) * (1 + self.random.uniform(-0.01, 0.01)), 6)}
+                for mint in ids if mint
+            }}
+
+    def quote(self, query: dict) -> dict:
+        input_mint = query["inputMint"][0]
+        output_mint = query["outputMint"][0]
+        amount = int(query["amount"][0])
+        rate = stable_price(input_mint) / stable_price(output_mint)
+        if self.decimals:
+            rate *= 10 ** (self.decimals.get(output_mint, 6) - self.decimals.get(input_mint, 6))
+        # Larger trades get proportionally worse prices
+        impact = min(0.5, amount / self.impact_depth)
+        return {
+            "inputMint": input_mint,
+            "outputMint": output_mint,
+            "inAmount": str(amount),
+            "outAmount": str(int(amount * rate * (1 - impact))),
+            "priceImpactPct": str(impact),
+            "slippageBps": int(query.get("slippageBps", ["50"])[0]),
+            "routePlan": [],
+            "contextSlot": int(time.time()),
+        }
+
+    def balances(self, wallet: str) -> dict:
+        return {
+            "nativeBalance": 5_000_000_000,
+            "tokens": [
+                {"mint": f"{wallet[:8]}Token{i}", "amount": 1000 * (i + 1), "decimals": 6}
+                for i in range(min(self.wallet_assets, 100))
+            ],
+        }
+
+    def assets_by_owner(self, params: dict) -> dict:
+        page, limit = params.get("page", 1), params.get("limit", 1000)
+        start = (page - 1) * limit
+        items = [
+            {
+                "id": f"{params['ownerAddress'][:8]}Asset{i}",
+                "interface": "FungibleToken" if i % 4 == 0 else "V1_NFT",
+                "content": {"metadata": {"name": f"Asset {i}"}},
+                "token_info": {"balance": 1000 * (i + 1), "decimals": 3} if i % 4 == 0 else {},
+            }
+            for i in range(start, min(start + limit, self.wallet_assets))
+        ]
+        return {"jsonrpc": "2.0", "id": "stub", "result": {"total": self.wallet_assets, "page": page, "items": items}}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status: int, payload: dict = None):
+                body = json.dumps(payload or {}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 503:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _dispatch(self, endpoint: str, build):
+                with stub._lock:
+                    stub.calls[endpoint] += 1
+                if stub._delay_and_maybe_fail():
+                    self._send(503)
+                else:
+                    self._send(200, build())
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                if parts.path.endswith("/price"):
+                    self._dispatch("jupiter_price", lambda: stub.price(query))
+                elif parts.path.endswith("/quote"):
+                    self._dispatch("jupiter_quote", lambda: stub.quote(query))
+                elif parts.path.endswith("/balances"):
+                    wallet = parts.path.split("/")[-2]
+                    self._dispatch("helius_balances", lambda: stub.balances(wallet))
+                else:
+                    self._send(404)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if body.get("method") == "getAssetsByOwner":
+                    self._dispatch("helius_assets", lambda: stub.assets_by_owner(body.get("params", {})))
+                else:
+                    self._send(404)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--wallet-assets", type=int, default=50)
+    args = parser.parse_args()
+
+    stub = StubUpstream(args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.wallet_assets).start()
+    print("Add to .streamlit/secrets.toml:")
+    for key, value in stub.secrets().items():
+        print(f'{key} = "{value}"')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stub.stop()
+
+if __name__ == "__main__":
+    main()
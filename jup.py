@@ -1,226 +1,93 @@
 import streamlit as st
-import requests
-import json
+import logging
 import time
+import math
+import uuid
 from datetime import datetime
-import pandas as pd
-from typing import Dict, List, Optional
-import base64
-from dataclasses import dataclass
-import asyncio
+from typing import List
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
-# Configuration using Streamlit secrets
-@st.cache_data
-def get_config():
-    """Get configuration from Streamlit secrets"""
-    try:
-        return {
-            "JUPITER_API_BASE": st.secrets.get("JUPITER_API_BASE", "https://quote-api.jup.ag/v6"),
-            "SOLANA_RPC_URL": st.secrets.get("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com"),
-            "HELIUS_API_KEY": st.secrets.get("HELIUS_API_KEY", "")
-        }
-    except Exception as e:
-        st.error(f"Error loading secrets: {e}")
-        # Return default values if secrets are not available
-        return {
-            "JUPITER_API_BASE": "https://quote-api.jup.ag/v6",
-            "SOLANA_RPC_URL": "https://api.mainnet-beta.solana.com",
-            "HELIUS_API_KEY": ""
-        }
-
-@dataclass
-class GameItem:
-    id: str
-    name: str
-    rarity: str
-    token_mint: str
-    price_sol: float
-    description: str
-    game: str
-
-@dataclass
-class Achievement:
-    id: str
-    name: str
-    description: str
-    token_reward: str
-    reward_amount: float
-    unlocked: bool
-
-@dataclass
-class GuildMember:
-    wallet: str
-    role: str
-    contribution_score: int
-    joined_date: str
-
-class JupiterAPI:
-    def __init__(self):
-        self.config = get_config()
-    
-    def get_token_price(self, mint_address: str) -> float:
-        """Get token price from Jupiter API"""
-        try:
-            response = requests.get(f"{self.config['JUPITER_API_BASE']}/price?ids={mint_address}")
-            if response.status_code == 200:
-                data = response.json()
-                return data.get('data', {}).get(mint_address, {}).get('price', 0.0)
-        except Exception as e:
-            st.error(f"Error fetching price: {e}")
-        return 0.0
-    
-    def get_swap_quote(self, input_mint: str, output_mint: str, amount: int):
-        """Get swap quote from Jupiter"""
-        try:
-            params = {
-                'inputMint': input_mint,
-                'outputMint': output_mint,
-                'amount': amount,
-                'slippageBps': 50  # 0.5% slippage
-            }
-            response = requests.get(f"{self.config['JUPITER_API_BASE']}/quote", params=params)
-            if response.status_code == 200:
-                return response.json()
-        except Exception as e:
-            st.error(f"Error getting swap quote: {e}")
-        return None
-
-class HeliusAPI:
-    def __init__(self):
-        self.config = get_config()
-        self.api_key = self.config['HELIUS_API_KEY']
-        self.base_url = f"https://api.helius.xyz/v0"
-    
-    def get_wallet_assets(self, wallet_address: str):
-        """Get wallet assets using Helius API"""
-        if not self.api_key:
-            st.warning("Helius API key not configured")
-            return []
-        
-        try:
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            response = requests.get(
-                f"{self.base_url}/addresses/{wallet_address}/balances?api-key={self.api_key}",
-                headers=headers
-            )
-            if response.status_code == 200:
-                return response.json()
-        except Exception as e:
-            st.error(f"Error fetching wallet assets: {e}")
-        return []
+from jupy_core import (
+    GAME_TOKEN_MINTS,
+    TOKEN_DECIMALS,
+    TOKEN_MINTS,
+    TOKEN_SYMBOLS,
+    SUPPORTED_WALLETS,
+    AchievementSystem,
+    AsyncHeliusAPI,
+    GameItem,
+    GameItemMarketplace,
+    GuildTreasury,
+    JupiterAPI,
+    LazyModule,
+    SolanaWallet,
+    get_achievement_engine,
+    get_auto_swap_engine,
+    get_config,
+    get_http_transport,
+    get_metrics,
+    get_price_cache,
+    get_price_history,
+    get_quote_coalescer,
+    get_quote_ladders,
+    logger,
+    run_async,
+    set_config_source,
+)
 
-# Removed unnecessary API classes - keeping only Jupiter and Helius
+pd = LazyModule("pandas", "pd", globals())
 
-class SolanaWallet:
-    def __init__(self):
-        self.connected = False
-        self.public_key = None
-        self.balance = 0.0
-        self.helius_api = HeliusAPI()
-    
-    def connect_wallet(self, wallet_type: str = "Phantom"):
-        """Simulate wallet connection - In production, use Streamlit JS bridge"""
-        if wallet_type in st.session_state.get('available_wallets', []):
-            self.connected = True
-            self.public_key = st.session_state.get('wallet_address', 'Demo_Wallet_Address')
-            self.balance = st.session_state.get('wallet_balance', 5.0)
-            return True
-        return False
-    
-    def disconnect_wallet(self):
-        """Disconnect wallet"""
-        self.connected = False
-        self.public_key = None
-        self.balance = 0.0
-    
-    def get_wallet_assets(self):
-        """Get wallet assets using Helius API"""
-        if self.connected and self.public_key:
-            return self.helius_api.get_wallet_assets(self.public_key)
-        return []
+# Configuration using Streamlit secrets
+set_config_source(st.secrets)
 
-class GameItemMarketplace:
-    def __init__(self):
-        self.items = self._initialize_items()
-        self.jupiter_api = JupiterAPI()
-    
-    def _initialize_items(self) -> List[GameItem]:
-        """Initialize demo game items"""
-        return [
-            GameItem("sword_001", "Legendary Fire Sword", "Legendary", "So11111111111111111111111111111111111111112", 2.5, "A powerful sword that burns enemies", "Fantasy RPG"),
-            GameItem("shield_001", "Diamond Shield", "Epic", "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v", 1.8, "Unbreakable diamond shield", "Fantasy RPG"),
-            GameItem("bow_001", "Elven Longbow", "Rare", "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB", 1.2, "Precise elven craftsmanship", "Fantasy RPG"),
-            GameItem("skin_001", "Cosmic Warrior Skin", "Legendary", "So11111111111111111111111111111111111111112", 3.0, "Exclusive cosmic themed skin", "Battle Arena"),
-            GameItem("car_001", "Speed Demon Vehicle", "Epic", "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v", 2.2, "Fastest car in the racing game", "Racing World"),
-        ]
-    
-    def get_items_by_game(self, game: str) -> List[GameItem]:
-        return [item for item in self.items if item.game == game]
+class StreamlitErrorHandler(logging.Handler):
+    """Show errors logged by the core on the page of the session that triggered them"""
     
-    def get_real_time_price(self, token_mint: str) -> float:
-        """Get real-time price using Jupiter API"""
-        return self.jupiter_api.get_token_price(token_mint)
+    def emit(self, record: logging.LogRecord):
+        # Background workers have no page to draw on; their errors are only logged
+        if get_script_run_ctx(suppress_warning=True) is None:
+            return
+        if record.levelno >= logging.ERROR:
+            st.error(self.format(record))
+        else:
+            st.warning(self.format(record))
 
-class AchievementSystem:
-    def __init__(self):
-        self.achievements = self._initialize_achievements()
-    
-    def _initialize_achievements(self) -> List[Achievement]:
-        return [
-            Achievement("ach_001", "First Victory", "Win your first match", "GAME", 10.0, True),
-            Achievement("ach_002", "Speed Demon", "Complete 10 races under 2 minutes", "SPEED", 25.0, False),
-            Achievement("ach_003", "Treasure Hunter", "Find 50 hidden treasures", "TREASURE", 50.0, True),
-            Achievement("ach_004", "Guild Leader", "Lead a guild for 30 days", "LEADER", 100.0, False),
-            Achievement("ach_005", "Master Trader", "Complete 100 item trades", "TRADE", 75.0, False),
-        ]
+@st.cache_resource
+def install_error_handler():
+    """Attach StreamlitErrorHandler to the core logger once per process"""
+    handler = StreamlitErrorHandler(logging.WARNING)
+    logger.addHandler(handler)
+    return handler
 
-class GuildTreasury:
-    def __init__(self):
-        self.guild_name = ""
-        self.treasury_balance = 0.0
-        self.members = []
-        self.transactions = []
-    
-    def add_member(self, wallet: str, role: str = "Member"):
-        member = GuildMember(wallet, role, 0, datetime.now().strftime("%Y-%m-%d"))
-        self.members.append(member)
-    
-    def deposit_to_treasury(self, amount: float, from_wallet: str):
-        self.treasury_balance += amount
-        transaction = {
-            "type": "Deposit",
-            "amount": amount,
-            "from": from_wallet,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        self.transactions.append(transaction)
-    
-    def withdraw_from_treasury(self, amount: float, to_wallet: str, purpose: str):
-        if amount <= self.treasury_balance:
-            self.treasury_balance -= amount
-            transaction = {
-                "type": "Withdrawal",
-                "amount": amount,
-                "to": to_wallet,
-                "purpose": purpose,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            self.transactions.append(transaction)
-            return True
-        return False
+install_error_handler()
 
-# Initialize session state
+# Initialize session state; marketplace, achievements and guild are created
+# by session_object when their view is first opened. The first two are thin
+# views over process-wide definitions and per-wallet overlays in jupy_core
 if 'wallet' not in st.session_state:
     st.session_state.wallet = SolanaWallet()
-    st.session_state.marketplace = GameItemMarketplace()
-    st.session_state.achievements = AchievementSystem()
-    st.session_state.guild = GuildTreasury()
-    st.session_state.available_wallets = ["Phantom", "Solflare", "Backpack"]
+    st.session_state.available_wallets = list(SUPPORTED_WALLETS)
     st.session_state.wallet_address = None
     st.session_state.wallet_balance = 5.0
+    st.session_state.session_id = uuid.uuid4().hex
+
+def session_object(name: str, factory):
+    """Per-session object stored in session state, created on first use"""
+    if name not in st.session_state:
+        st.session_state[name] = factory()
+    return st.session_state[name]
+
+def idempotency_key(action: str, clicked: bool) -> str:
+    """Idempotency key for a button-triggered write
+    
+    A double-click reaches the script as back-to-back reruns that both report
+    the click; they share a key, so the write is applied once. Any rerun
+    without the click issues a fresh key for the next one.
+    """
+    name = f"{action}_idempotency_key"
+    if not clicked or name not in st.session_state:
+        st.session_state[name] = f"{st.session_state.session_id}:{uuid.uuid4().hex}"
+    return st.session_state[name]
 
 def check_api_keys():
     """Check if API keys are configured properly"""
@@ -235,6 +102,10 @@ def check_api_keys():
 
 def display_api_status():
     """Display API configuration status"""
+    config_error = get_config().get("CONFIG_ERROR")
+    if config_error:
+        st.error(f"Error loading secrets: {config_error}")
+    
     with st.expander("🔑 API Configuration Status"):
         api_status = check_api_keys()
         
@@ -246,6 +117,566 @@ def display_api_status():
         if unconfigured_apis:
             st.warning(f"⚠️ Unconfigured APIs: {', '.join(unconfigured_apis)}")
             st.info("Add HELIUS_API_KEY to Streamlit secrets for wallet data")
+        
+        cache_stats = get_price_cache().stats()
+        st.caption(
+            f"Price cache: {cache_stats['size']}/{cache_stats['max_size']} entries, "
+            f"{cache_stats['hit_ratio']:.0%} hit ratio "
+            f"({cache_stats['hits']} hits, {cache_stats['stale_hits']} stale, "
+            f"{cache_stats['misses']} misses, {cache_stats['evictions']} evictions)"
+        )
+        
+        quote_stats = get_quote_coalescer().stats()
+        st.caption(
+            f"Quote cache: {quote_stats['size']} entries "
+            f"({quote_stats['hits']} hits, {quote_stats['coalesced']} coalesced, "
+            f"{quote_stats['misses']} upstream calls)"
+        )
+        
+        transport = get_http_transport()
+        for host, breaker in transport.breakers.items():
+            if breaker.state != "closed":
+                st.warning(f"⚠️ {host} circuit {breaker.state}, showing fallback prices")
+        
+        for host, limiter in transport.limiters.items():
+            limiter_stats = limiter.stats()
+            if limiter_stats['shed_interactive'] or limiter_stats['shed_background']:
+                st.caption(
+                    f"{host} rate limit: {limiter_stats['shed_background']} background and "
+                    f"{limiter_stats['shed_interactive']} interactive calls shed"
+                )
+
+def is_admin() -> bool:
+    admin_wallets = [wallet.strip() for wallet in get_config()['ADMIN_WALLETS'].split(",") if wallet.strip()]
+    wallet = st.session_state.wallet
+    return wallet.connected and wallet.public_key in admin_wallets
+
+def display_ops_metrics():
+    """Display hot-path metrics for admins"""
+    metrics = get_metrics()
+    if not metrics.enabled or not is_admin():
+        return
+    
+    with st.expander("🛠️ Ops Metrics"):
+        histograms, counters, session_reruns = metrics.snapshot()
+        
+        latency_rows = [
+            {
+                "Metric": name,
+                "Labels": ", ".join(f"{key}={value}" for key, value in labels),
+                "Count": sum(histogram[:-1]),
+                "Mean (ms)": histogram[-1] / max(sum(histogram[:-1]), 1) * 1000,
+                "p50 ≤ (ms)": metrics.quantile(histogram, 0.5) * 1000,
+                "p95 ≤ (ms)": metrics.quantile(histogram, 0.95) * 1000
+            }
+            for (name, labels), histogram in sorted(histograms.items())
+        ]
+        if latency_rows:
+            st.dataframe(pd.DataFrame(latency_rows), use_container_width=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Counters and gauges**")
+            st.json({
+                name + (str(dict(labels)) if labels else ""): value
+                for (name, labels), value in sorted({**counters, **metrics.gauges()}.items())
+            })
+        with col2:
+            st.markdown("**Reruns per session**")
+            st.metric("This session", session_reruns.get(st.session_state.session_id, 0))
+            if session_reruns:
+                st.write(f"{len(session_reruns)} active sessions, max {max(session_reruns.values())} reruns")
+        
+        st.download_button("Download Prometheus metrics", metrics.render_prometheus(),
+                           file_name="jupy_metrics.prom", mime="text/plain")
+
+@st.fragment(run_every=get_config()['PRICE_FEED_INTERVAL'])
+def render_marketplace_grid(items: List[GameItem]):
+    """Item grid that reruns on its own as price ticks arrive, without rerunning the app"""
+    # Prefetch every visible price in one pass instead of one call per item
+    real_time_prices = st.session_state.marketplace.get_real_time_prices(items)
+    owned = st.session_state.marketplace.owned_items(st.session_state.wallet.public_key)
+    
+    cols = st.columns(3)
+    for i, item in enumerate(items):
+        with cols[i % 3]:
+            with st.container():
+                st.markdown(f"### {item.name}")
+                st.markdown(f"**Rarity:** {item.rarity}")
+                st.markdown(f"**Game:** {item.game}")
+                
+                # Try to get real-time price
+                real_time_price = real_time_prices.get(item.token_mint, 0.0)
+                display_price = real_time_price if real_time_price > 0 else item.price_sol
+                st.markdown(f"**Price:** {display_price:.4f} SOL")
+                
+                st.markdown(f"*{item.description}*")
+                if item.id in owned:
+                    st.caption(f"✅ Owned: {owned[item.id]}")
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("Buy", key=f"buy_{item.id}"):
+                        if st.session_state.wallet.balance >= display_price:
+                            st.session_state.wallet.balance -= display_price
+                            st.session_state.marketplace.record_purchase(st.session_state.wallet.public_key,
+                                                                         item, display_price)
+                            get_achievement_engine().submit({"player": st.session_state.wallet.public_key,
+                                                             "type": "item_traded", "item": item.id})
+                            st.success(f"Purchased {item.name}!")
+                            st.rerun()
+                        else:
+                            st.error("Insufficient balance")
+                
+                with col2:
+                    if st.button("Swap", key=f"swap_{item.id}"):
+                        st.info("Opening swap interface...")
+    
+    price_feed = st.session_state.marketplace.price_feed
+    if price_feed.updated_at:
+        st.caption(f"Prices updated {time.time() - price_feed.updated_at:.0f}s ago")
+
+def render_marketplace():
+    """Item marketplace view: filters, the paged item grid and the swap form"""
+    st.header("🛒 In-Game Asset Exchange")
+    
+    if not st.session_state.wallet.connected:
+        st.warning("Please connect your wallet to access the marketplace")
+        return
+    
+    marketplace = session_object("marketplace", GameItemMarketplace)
+    catalog = marketplace.catalog
+    
+    # Filters
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        games = ["All Games"] + catalog.values("game")
+        selected_game = st.selectbox("Filter by Game", games)
+    with col2:
+        rarities = ["All Rarities"] + catalog.values("rarity")
+        selected_rarity = st.selectbox("Filter by Rarity", rarities)
+    with col3:
+        sort_labels = {"Price: Low to High": "price_asc", "Price: High to Low": "price_desc", "Name": "name"}
+        selected_sort = st.selectbox("Sort by", list(sort_labels))
+    
+    # Display only the current page of items
+    page_size = get_config()['MARKETPLACE_PAGE_SIZE']
+    filters = {
+        "game": selected_game if selected_game != "All Games" else None,
+        "rarity": selected_rarity if selected_rarity != "All Rarities" else None,
+        "sort": sort_labels[selected_sort]
+    }
+    total = marketplace.search(limit=0, **filters).total
+    page_count = max(1, math.ceil(total / page_size))
+    page_number = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+    page = marketplace.search(offset=(page_number - 1) * page_size, limit=page_size, **filters)
+    st.caption(f"Showing {len(page.items)} of {page.total} items")
+    
+    render_marketplace_grid(page.items)
+    
+    # Swap Interface
+    st.divider()
+    st.subheader("🔄 Token Swap Interface")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        input_token = st.selectbox("From Token", ["SOL", "USDC", "USDT"])
+    with col2:
+        output_token = st.selectbox("To Token", ["GAME", "SPEED", "TREASURE"])
+    with col3:
+        amount = st.number_input("Amount", min_value=0.1, value=1.0, step=0.1)
+    
+    # Instant indicative price from the shared quote ladders; Jupiter is only
+    # asked for a firm quote once the user proceeds
+    input_mint, output_mint = TOKEN_MINTS[input_token], GAME_TOKEN_MINTS[output_token]
+    in_amount = round(amount * 10 ** TOKEN_DECIMALS[input_mint])
+    out_unit = 10 ** TOKEN_DECIMALS[output_mint]
+    ladders = get_quote_ladders()
+    indicative = ladders.indicative(input_mint, output_mint, in_amount)
+    if indicative is None:
+        st.caption("No indicative price for this pair yet; a firm quote is still available")
+    elif indicative.stale:
+        st.warning(f"Indicative price is {indicative.age:.0f}s old and may be out of date; get a firm quote to trade")
+    else:
+        st.metric(f"Indicative {output_token}", f"≈ {indicative.out_amount / out_unit:,.4f}",
+                  help="Interpolated from background Jupiter quotes at nearby amounts")
+        st.caption(f"Est. price impact {float(indicative.price_impact_pct) * 100:.2f}"
+                   f"{'%+ (beyond quoted sizes)' if indicative.extrapolated else '%'} · "
+                   f"quoted {indicative.age:.0f}s ago")
+    
+    request = (input_mint, output_mint, in_amount)
+    if st.button("Get Firm Quote"):
+        with st.spinner("Getting quote from Jupiter..."):
+            quote = JupiterAPI().get_firm_quote(input_mint, output_mint, in_amount)
+        if quote:
+            st.session_state.firm_quote = (request, quote, time.time())
+        else:
+            st.session_state.pop("firm_quote", None)
+            st.error("Jupiter did not return a quote; try again shortly")
+    
+    firm = st.session_state.get("firm_quote")
+    if firm and firm[0] == request:
+        _, quote, quoted_at = firm
+        age = time.time() - quoted_at
+        out_amount = int(quote.get('outAmount', 0)) / out_unit
+        if age > get_config()['FIRM_QUOTE_TTL']:
+            st.warning(f"Firm quote expired ({age:.0f}s old); get a new one to execute")
+        else:
+            st.success(f"Quote: {amount} {input_token} → {out_amount:,.4f} {output_token} "
+                       f"(impact {float(quote.get('priceImpactPct') or 0.0) * 100:.2f}%)")
+            if st.button("Execute Swap"):
+                st.session_state.pop("firm_quote", None)
+                st.success("Swap executed successfully!")
+
+def render_achievements():
+    """Achievement rewards view"""
+    st.header("🏆 Achievement Token Rewards")
+    
+    if not st.session_state.wallet.connected:
+        st.warning("Please connect your wallet to view achievements")
+        return
+    
+    achievements = session_object("achievements", AchievementSystem)
+    # Unlocks are evaluated from the game event stream by a shared background engine
+    engine = get_achievement_engine()
+    achievements.sync(engine, st.session_state.wallet.public_key)
+    progress = engine.progress_for(st.session_state.wallet.public_key)
+    
+    for achievement in achievements.achievements:
+        with st.expander(f"{'✅' if achievement.unlocked else '⏳'} {achievement.name}"):
+            st.write(f"**Description:** {achievement.description}")
+            st.write(f"**Reward:** {achievement.reward_amount} {achievement.token_reward}")
+            st.write(f"**Status:** {'Unlocked' if achievement.unlocked else 'Locked'}")
+            if not achievement.unlocked and achievement.id in progress:
+                count, target = progress[achievement.id]
+                st.progress(count / target, text=f"{count}/{target}")
+            
+            if achievement.unlocked:
+                if st.button(f"Claim {achievement.reward_amount} {achievement.token_reward}", key=f"claim_{achievement.id}"):
+                    st.success(f"Claimed {achievement.reward_amount} {achievement.token_reward} tokens!")
+                    # Add tokens to wallet balance simulation
+                    st.session_state.wallet.balance += achievement.reward_amount * 0.01  # Convert to SOL equivalent
+
+def render_play_to_earn():
+    """Play-to-earn session and auto-swap settings view"""
+    st.header("💰 Play-to-Earn Integration")
+    
+    if not st.session_state.wallet.connected:
+        st.warning("Please connect your wallet to access play-to-earn features")
+        return
+    
+    wallet = st.session_state.wallet
+    
+    # Game session simulator
+    st.subheader("🎮 Active Game Session")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Current Score", "2,450")
+    with col2:
+        st.metric("Tokens Earned", "124 GAME")
+    with col3:
+        st.metric("Session Time", "23:45")
+    
+    # Auto-swap settings
+    st.subheader("⚙️ Auto-Swap Settings")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        auto_swap = st.checkbox("Enable Auto-Swap")
+        threshold = st.number_input("Swap when earning exceeds", value=100, step=10)
+    with col2:
+        swap_to = st.selectbox("Auto-swap to", ["SOL", "USDC", "Keep as GAME"])
+        swap_percentage = st.slider("Percentage to swap", 0, 100, 50)
+    
+    engine = get_auto_swap_engine()
+    if auto_swap:
+        st.info(f"Auto-swap enabled: {swap_percentage}% of earnings will be swapped to {swap_to} when threshold of {threshold} tokens is reached")
+    
+    # Manual claim
+    st.subheader("💎 Claim Rewards")
+    pending_rewards = 124
+    
+    if st.button(f"Claim {pending_rewards} GAME Tokens"):
+        st.success(f"Claimed {pending_rewards} GAME tokens!")
+        if auto_swap and swap_to in TOKEN_MINTS and pending_rewards >= threshold:
+            swap_amount = pending_rewards * (swap_percentage / 100)
+            # Swaps are pooled with other players' and executed in the next batch
+            game_mint = GAME_TOKEN_MINTS["GAME"]
+            engine.submit(wallet.public_key, game_mint, TOKEN_MINTS[swap_to],
+                          round(swap_amount * 10 ** TOKEN_DECIMALS[game_mint]))
+            st.info(f"Auto-swapping {swap_amount:.1f} GAME to {swap_to} in the next batch "
+                    f"(every {engine.batch_window:.0f}s)")
+    
+    # Auto-swap results, allocated back from the pooled batches
+    queued = engine.pending_for(wallet.public_key)
+    fills = engine.allocations_for(wallet.public_key)
+    if queued or fills:
+        st.subheader("🔁 Auto-Swap Batches")
+        for input_mint, output_mint, amount in queued:
+            st.caption(f"Queued: {amount / 10 ** TOKEN_DECIMALS.get(input_mint, 0):,.2f} "
+                       f"{TOKEN_SYMBOLS.get(input_mint, input_mint[:8])} → "
+                       f"{TOKEN_SYMBOLS.get(output_mint, output_mint[:8])}")
+        if fills:
+            st.dataframe(pd.DataFrame([
+                {
+                    "Batch": batch.batch_id,
+                    "Executed": datetime.fromtimestamp(batch.executed_at).strftime("%H:%M:%S"),
+                    "Swapped": f"{fill.amount_in / 10 ** TOKEN_DECIMALS.get(fill.input_mint, 0):,.2f} "
+                               f"{TOKEN_SYMBOLS.get(fill.input_mint, fill.input_mint[:8])}",
+                    "Received": f"{fill.amount_out / 10 ** TOKEN_DECIMALS.get(fill.output_mint, 0):,.6f} "
+                                f"{TOKEN_SYMBOLS.get(fill.output_mint, fill.output_mint[:8])}",
+                    "Batch Orders": batch.orders,
+                    "Quote Calls": batch.quote_calls
+                }
+                for batch, fill in fills
+            ]), use_container_width=True)
+
+def render_treasury():
+    """Guild treasury view: actions, members, analytics and transactions"""
+    metrics = get_metrics()
+    st.header("🏛️ Gaming Guild Treasury")
+    
+    if not st.session_state.wallet.connected:
+        st.warning("Please connect your wallet to access guild features")
+        return
+    
+    guild = session_object("guild", GuildTreasury)
+    
+    # Guild setup
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Guild Information")
+        guild_name = st.text_input("Guild Name", value="Crypto Warriors")
+        guild.guild_name = guild_name
+        
+        st.metric("Treasury Balance", f"{guild.treasury_balance:.2f} SOL")
+        st.metric("Total Members", len(guild.members))
+    
+    with col2:
+        st.subheader("Treasury Actions")
+        
+        # Deposit
+        deposit_amount = st.number_input("Deposit Amount (SOL)", min_value=0.1, value=1.0, step=0.1)
+        clicked = st.button("Deposit to Treasury")
+        key = idempotency_key("deposit", clicked)
+        if clicked:
+            if st.session_state.wallet.balance >= deposit_amount:
+                result = guild.deposit_to_treasury(deposit_amount, st.session_state.wallet.public_key, key)
+                if not result.duplicate:
+                    st.session_state.wallet.balance -= deposit_amount
+                st.success(f"Deposited {deposit_amount} SOL to guild treasury!")
+                st.rerun()
+            else:
+                st.error("Insufficient balance")
+        
+        # Withdraw
+        withdraw_amount = st.number_input("Withdraw Amount (SOL)", min_value=0.1, value=0.5, step=0.1)
+        withdraw_purpose = st.text_input("Purpose", placeholder="e.g., Tournament prize")
+        clicked = st.button("Withdraw from Treasury")
+        key = idempotency_key("withdraw", clicked)
+        if clicked:
+            result = guild.withdraw_from_treasury(withdraw_amount, st.session_state.wallet.public_key,
+                                                  withdraw_purpose, key)
+            if result.row_id is not None:
+                if not result.duplicate:
+                    st.session_state.wallet.balance += withdraw_amount
+                st.success(f"Withdrawn {withdraw_amount} SOL from guild treasury!")
+                st.rerun()
+            else:
+                st.error("Insufficient treasury balance")
+    
+    # Guild Members
+    st.subheader("👥 Guild Members")
+    
+    # Add member
+    with st.expander("Add New Member"):
+        new_member_wallet = st.text_input("Wallet Address")
+        new_member_role = st.selectbox("Role", ["Member", "Officer", "Leader"])
+        if st.button("Add Member"):
+            guild.add_member(new_member_wallet, new_member_role)
+            st.success("Member added successfully!")
+            st.rerun()
+    
+    # Synced with the ledger once per render and shared by the members table and the charts
+    analytics = guild.analytics
+    
+    # Display members
+    if guild.members:
+        guild.refresh_contributions(analytics)
+        with metrics.timer("jupy_dataframe_build_seconds", table="guild_members"):
+            members_df = pd.DataFrame([
+                {
+                    "Wallet": member.wallet[:8] + "..." + member.wallet[-8:] if len(member.wallet) > 16 else member.wallet,
+                    "Role": member.role,
+                    "Contribution": member.contribution_score,
+                    "Joined": member.joined_date
+                }
+                for member in guild.members
+            ])
+        st.dataframe(members_df, use_container_width=True)
+        
+        if st.button("Load Member Assets"):
+            with st.spinner("Loading member wallets from Helius..."):
+                wallets = [member.wallet for member in guild.members]
+                member_assets = run_async(AsyncHeliusAPI(st.session_state.wallet.helius_api).get_wallets_assets(wallets))
+            for wallet, assets in member_assets.items():
+                with st.expander(f"Assets for {wallet[:8]}..."):
+                    st.json(assets)
+    
+    # Treasury Analytics
+    st.subheader("📈 Treasury Analytics")
+    if analytics.size:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Top Contributors**")
+            st.dataframe(analytics.top_contributors(10), use_container_width=True)
+        with col2:
+            st.markdown("**Daily Inflow / Outflow (30 days)**")
+            st.bar_chart(analytics.daily_rollup(30)[["Inflow", "Outflow"]])
+        st.markdown("**Weekly Rollup**")
+        st.dataframe(analytics.weekly_rollup(12), use_container_width=True)
+    
+    # Transaction History
+    st.subheader("📊 Treasury Transactions")
+    if guild.transaction_count():
+        col1, col2 = st.columns(2)
+        with col1:
+            tx_type = st.selectbox("Transaction Type", ["All", "Deposit", "Withdrawal"])
+        with col2:
+            tx_wallet = st.text_input("Filter by Wallet", placeholder="Full wallet address")
+        filters = {
+            "tx_type": tx_type if tx_type != "All" else None,
+            "wallet": tx_wallet or None
+        }
+        
+        # Only the visible page is read from the ledger and turned into a DataFrame.
+        # Pages are keyset cursors (the id each page starts below), reset when the filters change
+        page_size = get_config()['TREASURY_PAGE_SIZE']
+        cursor_key = (guild.guild_name, filters["tx_type"], filters["wallet"])
+        if st.session_state.get("treasury_cursor_key") != cursor_key:
+            st.session_state.treasury_cursor_key = cursor_key
+            st.session_state.treasury_cursors = [None]
+        cursors = st.session_state.treasury_cursors
+        transactions = guild.get_transactions(cursors[-1], page_size, **filters)
+        if transactions:
+            with metrics.timer("jupy_dataframe_build_seconds", table="treasury_transactions"):
+                transactions_df = pd.DataFrame(transactions)
+            st.dataframe(transactions_df, use_container_width=True)
+        else:
+            st.info("No matching transactions")
+        
+        page_count = max(1, math.ceil(guild.transaction_count(**filters) / page_size))
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("← Newer", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            st.caption(f"Transactions page {len(cursors)} of {page_count}")
+        with col3:
+            if st.button("Older →", disabled=len(transactions) < page_size):
+                cursors.append(transactions[-1]["id"])
+                st.rerun()
+    else:
+        st.info("No transactions yet")
+
+def render_analytics():
+    """Trading analytics view, computed from the price history store"""
+    st.header("📈 Trading Analytics & Insights")
+    
+    if not st.session_state.wallet.connected:
+        st.warning("Please connect your wallet to view analytics")
+        return
+    
+    marketplace = session_object("marketplace", GameItemMarketplace)
+    
+    history = get_price_history()
+    tracked_mints = marketplace.catalog.values("token_mint")
+    now = time.time()
+    day = 24 * 3600
+    
+    # Portfolio overview, computed from the price history store
+    balance = st.session_state.wallet.balance
+    sol_price = history.latest_price(TOKEN_MINTS["SOL"])
+    sol_price_day_ago = history.price_at(TOKEN_MINTS["SOL"], now - day)
+    sol_change = history.change(TOKEN_MINTS["SOL"], day)
+    # Volume and trade counts are this wallet's own purchases, not the whole marketplace's
+    wallet_address = st.session_state.wallet.public_key
+    traded_volume, trades = marketplace.overlays.purchase_volume(wallet_address, now - day, now)
+    traded_volume_prev, trades_prev = marketplace.overlays.purchase_volume(wallet_address, now - 2 * day, now - day)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        if sol_price:
+            st.metric("Total Portfolio Value", f"${balance * sol_price:,.2f}",
+                      f"{sol_change:+.1%}" if sol_change is not None else None)
+        else:
+            st.metric("Total Portfolio Value", f"{balance:.2f} SOL")
+    with col2:
+        st.metric("24h Trading Volume", f"{traded_volume:.2f} SOL", f"{traded_volume - traded_volume_prev:+.2f}")
+    with col3:
+        st.metric("Items Traded", trades, f"{trades - trades_prev:+d}")
+    with col4:
+        if sol_price and sol_price_day_ago:
+            pnl = balance * (sol_price - sol_price_day_ago)
+            st.metric("Profit/Loss (24h)", f"${pnl:+,.2f}", f"{sol_change:+.1%}")
+        else:
+            st.metric("Profit/Loss (24h)", "n/a")
+    
+    # Price charts from recorded Jupiter prices
+    st.subheader("📊 Token Price Charts")
+    
+    ranges = {"1H": 3600, "24H": day, "7D": 7 * day, "30D": 30 * day, "1Y": 365 * day}
+    selected_range = st.radio("Range", list(ranges), index=1, horizontal=True)
+    max_points = get_config()['CHART_MAX_POINTS']
+    series = {
+        TOKEN_SYMBOLS.get(mint, mint[:8]): history.close_series(mint, now - ranges[selected_range], now, max_points)
+        for mint in tracked_mints
+    }
+    series = {name: points for name, points in series.items() if not points.empty}
+    
+    if series:
+        st.line_chart(pd.DataFrame(series))
+    else:
+        st.info("No price history recorded yet; prices are collected in the background")
+    
+    # Trading opportunities
+    st.subheader("🎯 Trading Opportunities")
+    
+    opportunities = [
+        {"Item": "Legendary Fire Sword", "Current Price": "2.5 SOL", "Trend": "↗️ Rising", "Recommendation": "HOLD"},
+        {"Item": "Diamond Shield", "Current Price": "1.8 SOL", "Trend": "↘️ Falling", "Recommendation": "BUY"},
+        {"Item": "Elven Longbow", "Current Price": "1.2 SOL", "Trend": "→ Stable", "Recommendation": "HOLD"},
+        {"Item": "Cosmic Warrior Skin", "Current Price": "3.0 SOL", "Trend": "↗️ Rising", "Recommendation": "SELL"},
+    ]
+    
+    opportunities_df = pd.DataFrame(opportunities)
+    st.dataframe(opportunities_df, use_container_width=True)
+
+VIEWS = {
+    "🛒 Item Marketplace": ("marketplace", render_marketplace),
+    "🏆 Achievements": ("achievements", render_achievements),
+    "💰 Play-to-Earn": ("play_to_earn", render_play_to_earn),
+    "🏛️ Guild Treasury": ("treasury", render_treasury),
+    "📈 Trading Analytics": ("analytics", render_analytics)
+}
+
+def display_quick_stats():
+    """Sidebar stats from the cached wallet snapshot and whichever views exist this session"""
+    st.header("📊 Quick Stats")
+    snapshot = st.session_state.wallet.get_asset_snapshot()
+    if snapshot and snapshot.version != st.session_state.get('asset_version'):
+        if st.session_state.get('asset_version') is not None:
+            st.toast(f"Wallet holdings changed: {len(snapshot.added)} added, "
+                     f"{len(snapshot.removed)} removed, {len(snapshot.changed)} updated")
+        st.session_state.asset_version = snapshot.version
+    st.metric("Items Owned", snapshot.items_owned if snapshot else 0)
+    # Views not opened yet this session show a placeholder instead of being built here
+    achievements = st.session_state.get('achievements')
+    guild = st.session_state.get('guild')
+    st.metric("Achievements", sum(1 for achievement in achievements.achievements if achievement.unlocked) if achievements else "—")
+    st.metric("Guild Treasury", f"{guild.treasury_balance:.2f} SOL" if guild else "—")
 
 def main():
     st.set_page_config(
@@ -258,8 +689,12 @@ def main():
     st.title("🎮 Jupiter Gaming Micro-Trading Platform")
     st.markdown("Trade game assets, earn tokens, and manage guild treasuries on Solana")
     
+    metrics = get_metrics()
+    metrics.record_rerun(st.session_state.session_id)
+    
     # Display API status
     display_api_status()
+    display_ops_metrics()
     
     # Wallet Connection Sidebar
     with st.sidebar:
@@ -269,7 +704,13 @@ def main():
             wallet_type = st.selectbox("Select Wallet", st.session_state.available_wallets)
             
             if st.button("Connect Wallet", type="primary"):
-                if st.session_state.wallet.connect_wallet(wallet_type):
+                connected = st.session_state.wallet.connect_wallet(
+                    wallet_type,
+                    st.session_state.available_wallets,
+                    st.session_state.get('wallet_address', 'Demo_Wallet_Address'),
+                    st.session_state.get('wallet_balance', 5.0)
+                )
+                if connected:
                     st.success(f"Connected to {wallet_type}!")
                     st.rerun()
                 else:
@@ -285,278 +726,18 @@ def main():
         
         st.divider()
         
-        # Quick Stats
-        st.header("📊 Quick Stats")
-        st.metric("Items Owned", 12)
-        st.metric("Achievements", 3)
-        st.metric("Guild Treasury", "2.4 SOL")
-    
-    # Main Content Tabs
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "🛒 Item Marketplace", 
-        "🏆 Achievements", 
-        "💰 Play-to-Earn", 
-        "🏛️ Guild Treasury",
-        "📈 Trading Analytics"
-    ])
-    
-    # Tab 1: Item Marketplace
-    with tab1:
-        st.header("🛒 In-Game Asset Exchange")
-        
-        if not st.session_state.wallet.connected:
-            st.warning("Please connect your wallet to access the marketplace")
-            return
-        
-        # Game selection
-        games = ["All Games", "Fantasy RPG", "Battle Arena", "Racing World"]
-        selected_game = st.selectbox("Filter by Game", games)
-        
-        # Display items
-        items = st.session_state.marketplace.items
-        if selected_game != "All Games":
-            items = st.session_state.marketplace.get_items_by_game(selected_game)
-        
-        cols = st.columns(3)
-        for i, item in enumerate(items):
-            with cols[i % 3]:
-                with st.container():
-                    st.markdown(f"### {item.name}")
-                    st.markdown(f"**Rarity:** {item.rarity}")
-                    st.markdown(f"**Game:** {item.game}")
-                    
-                    # Try to get real-time price
-                    real_time_price = st.session_state.marketplace.get_real_time_price(item.token_mint)
-                    display_price = real_time_price if real_time_price > 0 else item.price_sol
-                    st.markdown(f"**Price:** {display_price:.4f} SOL")
-                    
-                    st.markdown(f"*{item.description}*")
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button(f"Buy", key=f"buy_{item.id}"):
-                            if st.session_state.wallet.balance >= display_price:
-                                st.session_state.wallet.balance -= display_price
-                                st.success(f"Purchased {item.name}!")
-                                st.rerun()
-                            else:
-                                st.error("Insufficient balance")
-                    
-                    with col2:
-                        if st.button(f"Swap", key=f"swap_{item.id}"):
-                            st.info("Opening swap interface...")
-        
-        # Swap Interface
-        st.divider()
-        st.subheader("🔄 Token Swap Interface")
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            input_token = st.selectbox("From Token", ["SOL", "USDC", "USDT"])
-        with col2:
-            output_token = st.selectbox("To Token", ["GAME", "SPEED", "TREASURE"])
-        with col3:
-            amount = st.number_input("Amount", min_value=0.1, value=1.0, step=0.1)
-        
-        if st.button("Get Quote"):
-            with st.spinner("Getting quote from Jupiter..."):
-                # Use Jupiter API for real quote if available
-                jupiter_api = JupiterAPI()
-                # For demo purposes, we'll simulate the quote
-                time.sleep(1)
-                estimated_output = amount * 100  # Mock conversion rate
-                st.success(f"Quote: {amount} {input_token} → {estimated_output:.2f} {output_token}")
-                
-                if st.button("Execute Swap"):
-                    st.success("Swap executed successfully!")
+        # Filled in after the active view runs, so a view opened this run is counted
+        quick_stats = st.container()
     
-    # Tab 2: Achievements
-    with tab2:
-        st.header("🏆 Achievement Token Rewards")
-        
-        if not st.session_state.wallet.connected:
-            st.warning("Please connect your wallet to view achievements")
-            return
-        
-        for achievement in st.session_state.achievements.achievements:
-            with st.expander(f"{'✅' if achievement.unlocked else '⏳'} {achievement.name}"):
-                st.write(f"**Description:** {achievement.description}")
-                st.write(f"**Reward:** {achievement.reward_amount} {achievement.token_reward}")
-                st.write(f"**Status:** {'Unlocked' if achievement.unlocked else 'Locked'}")
-                
-                if achievement.unlocked:
-                    if st.button(f"Claim {achievement.reward_amount} {achievement.token_reward}", key=f"claim_{achievement.id}"):
-                        st.success(f"Claimed {achievement.reward_amount} {achievement.token_reward} tokens!")
-                        # Add tokens to wallet balance simulation
-                        st.session_state.wallet.balance += achievement.reward_amount * 0.01  # Convert to SOL equivalent
-    
-    # Tab 3: Play-to-Earn
-    with tab3:
-        st.header("💰 Play-to-Earn Integration")
-        
-        if not st.session_state.wallet.connected:
-            st.warning("Please connect your wallet to access play-to-earn features")
-            return
-        
-        # Game session simulator
-        st.subheader("🎮 Active Game Session")
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Current Score", "2,450")
-        with col2:
-            st.metric("Tokens Earned", "124 GAME")
-        with col3:
-            st.metric("Session Time", "23:45")
-        
-        # Auto-swap settings
-        st.subheader("⚙️ Auto-Swap Settings")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            auto_swap = st.checkbox("Enable Auto-Swap")
-            threshold = st.number_input("Swap when earning exceeds", value=100, step=10)
-        with col2:
-            swap_to = st.selectbox("Auto-swap to", ["SOL", "USDC", "Keep as GAME"])
-            swap_percentage = st.slider("Percentage to swap", 0, 100, 50)
-        
-        if auto_swap:
-            st.info(f"Auto-swap enabled: {swap_percentage}% of earnings will be swapped to {swap_to} when threshold of {threshold} tokens is reached")
-        
-        # Manual claim
-        st.subheader("💎 Claim Rewards")
-        pending_rewards = 124
-        
-        if st.button(f"Claim {pending_rewards} GAME Tokens"):
-            st.success(f"Claimed {pending_rewards} GAME tokens!")
-            if auto_swap and pending_rewards >= threshold:
-                swap_amount = pending_rewards * (swap_percentage / 100)
-                st.info(f"Auto-swapping {swap_amount:.1f} GAME to {swap_to}")
-    
-    # Tab 4: Guild Treasury
-    with tab4:
-        st.header("🏛️ Gaming Guild Treasury")
-        
-        if not st.session_state.wallet.connected:
-            st.warning("Please connect your wallet to access guild features")
-            return
-        
-        # Guild setup
-        col1, col2 = st.columns(2)
-        with col1:
-            st.subheader("Guild Information")
-            guild_name = st.text_input("Guild Name", value="Crypto Warriors")
-            st.session_state.guild.guild_name = guild_name
-            
-            st.metric("Treasury Balance", f"{st.session_state.guild.treasury_balance:.2f} SOL")
-            st.metric("Total Members", len(st.session_state.guild.members))
-        
-        with col2:
-            st.subheader("Treasury Actions")
-            
-            # Deposit
-            deposit_amount = st.number_input("Deposit Amount (SOL)", min_value=0.1, value=1.0, step=0.1)
-            if st.button("Deposit to Treasury"):
-                if st.session_state.wallet.balance >= deposit_amount:
-                    st.session_state.wallet.balance -= deposit_amount
-                    st.session_state.guild.deposit_to_treasury(deposit_amount, st.session_state.wallet.public_key)
-                    st.success(f"Deposited {deposit_amount} SOL to guild treasury!")
-                    st.rerun()
-                else:
-                    st.error("Insufficient balance")
-            
-            # Withdraw
-            withdraw_amount = st.number_input("Withdraw Amount (SOL)", min_value=0.1, value=0.5, step=0.1)
-            withdraw_purpose = st.text_input("Purpose", placeholder="e.g., Tournament prize")
-            if st.button("Withdraw from Treasury"):
-                if st.session_state.guild.withdraw_from_treasury(withdraw_amount, st.session_state.wallet.public_key, withdraw_purpose):
-                    st.session_state.wallet.balance += withdraw_amount
-                    st.success(f"Withdrawn {withdraw_amount} SOL from guild treasury!")
-                    st.rerun()
-                else:
-                    st.error("Insufficient treasury balance")
-        
-        # Guild Members
-        st.subheader("👥 Guild Members")
-        
-        # Add member
-        with st.expander("Add New Member"):
-            new_member_wallet = st.text_input("Wallet Address")
-            new_member_role = st.selectbox("Role", ["Member", "Officer", "Leader"])
-            if st.button("Add Member"):
-                st.session_state.guild.add_member(new_member_wallet, new_member_role)
-                st.success("Member added successfully!")
-                st.rerun()
-        
-        # Display members
-        if st.session_state.guild.members:
-            members_df = pd.DataFrame([
-                {
-                    "Wallet": member.wallet[:8] + "..." + member.wallet[-8:] if len(member.wallet) > 16 else member.wallet,
-                    "Role": member.role,
-                    "Contribution": member.contribution_score,
-                    "Joined": member.joined_date
-                }
-                for member in st.session_state.guild.members
-            ])
-            st.dataframe(members_df, use_container_width=True)
-        
-        # Transaction History
-        st.subheader("📊 Treasury Transactions")
-        if st.session_state.guild.transactions:
-            transactions_df = pd.DataFrame(st.session_state.guild.transactions)
-            st.dataframe(transactions_df, use_container_width=True)
-        else:
-            st.info("No transactions yet")
+    # Main content: only the selected view runs, so switching views and
+    # interacting with one never pays for the others
+    view = st.radio("View", list(VIEWS), horizontal=True, key="active_view", label_visibility="collapsed")
+    name, render = VIEWS[view]
+    with metrics.timer("jupy_tab_render_seconds", tab=name):
+        render()
     
-    # Tab 5: Trading Analytics
-    with tab5:
-        st.header("📈 Trading Analytics & Insights")
-        
-        if not st.session_state.wallet.connected:
-            st.warning("Please connect your wallet to view analytics")
-            return
-        
-        # Portfolio overview
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Total Portfolio Value", "12.5 SOL", "↗️ +2.3%")
-        with col2:
-            st.metric("24h Trading Volume", "156 GAME", "↗️ +15%")
-        with col3:
-            st.metric("Items Traded", "23", "↗️ +3")
-        with col4:
-            st.metric("Profit/Loss", "+3.2 SOL", "↗️ +34%")
-        
-        # Price charts (mock data)
-        st.subheader("📊 Token Price Charts")
-        
-        # Generate mock price data
-        import numpy as np
-        dates = pd.date_range(start='2024-01-01', end='2024-12-31', freq='D')
-        game_prices = np.random.randn(len(dates)).cumsum() + 100
-        
-        chart_data = pd.DataFrame({
-            'Date': dates,
-            'GAME Token': game_prices,
-            'SPEED Token': game_prices * 0.8 + np.random.randn(len(dates)) * 5,
-            'TREASURE Token': game_prices * 1.2 + np.random.randn(len(dates)) * 8
-        })
-        
-        st.line_chart(chart_data.set_index('Date'))
-        
-        # Trading opportunities
-        st.subheader("🎯 Trading Opportunities")
-        
-        opportunities = [
-            {"Item": "Legendary Fire Sword", "Current Price": "2.5 SOL", "Trend": "↗️ Rising", "Recommendation": "HOLD"},
-            {"Item": "Diamond Shield", "Current Price": "1.8 SOL", "Trend": "↘️ Falling", "Recommendation": "BUY"},
-            {"Item": "Elven Longbow", "Current Price": "1.2 SOL", "Trend": "→ Stable", "Recommendation": "HOLD"},
-            {"Item": "Cosmic Warrior Skin", "Current Price": "3.0 SOL", "Trend": "↗️ Rising", "Recommendation": "SELL"},
-        ]
-        
-        opportunities_df = pd.DataFrame(opportunities)
-        st.dataframe(opportunities_df, use_container_width=True)
+    with quick_stats:
+        display_quick_stats()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
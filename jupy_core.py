@@ -0,0 +1,2890 @@
+"""Streamlit-free core of the Jupiter gaming platform
+
+Domain logic (Jupiter and Helius clients, caches, price history, marketplace,
+achievements, treasury) lives here so back-office jobs can import it without
+Streamlit. Configuration comes from the environment unless a front end calls
+set_config_source (jup.py passes st.secrets). Upstream errors are logged to
+the "jupy" logger instead of being drawn on a page.
+"""
+from __future__ import annotations
+
+import requests
+import json
+import time
+from datetime import datetime, timezone
+import csv
+import sqlite3
+from typing import Dict, List, Optional
+from dataclasses import dataclass, replace
+import asyncio
+import threading
+import queue
+import os
+import sys
+import math
+import functools
+import bisect
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.retry import Retry
+import importlib
+import logging
+
+logger = logging.getLogger("jupy")
+
+class LazyModule:
+    """Stand-in for a heavy module that imports it on first attribute access
+    
+    Code paths that never touch pandas or numpy (such as the app's first
+    paint) skip their import cost. After the first access the real module
+    replaces the stand-in in ``namespace``, the importing module's globals.
+    """
+    
+    def __init__(self, name: str, alias: str, namespace: dict):
+        self._name = name
+        self._alias = alias
+        self._namespace = namespace
+    
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self._name)
+        self._namespace[self._alias] = module
+        return getattr(module, attr)
+
+pd = LazyModule("pandas", "pd", globals())
+np = LazyModule("numpy", "np", globals())
+
+def shared_resource(func):
+    """Memoize a factory per argument tuple for the life of the process
+    
+    The headless counterpart of st.cache_resource: every caller, Streamlit
+    session or worker thread gets the same instance. ``clear()`` drops them.
+    """
+    instances = {}
+    lock = threading.RLock()
+    
+    @functools.wraps(func)
+    def wrapper(*args):
+        with lock:
+            if args not in instances:
+                instances[args] = func(*args)
+            return instances[args]
+    
+    wrapper.clear = instances.clear
+    return wrapper
+
+# Default configuration, overridable per key through the environment or Streamlit secrets
+DEFAULT_CONFIG = {
+    "JUPITER_API_BASE": "https://quote-api.jup.ag/v6",
+    "HELIUS_API_BASE": "https://api.helius.xyz/v0",
+    "SOLANA_RPC_URL": "https://api.mainnet-beta.solana.com",
+    "HELIUS_API_KEY": "",
+    "PRICE_CACHE_TTL": 30.0,
+    "PRICE_CACHE_STALE_TTL": 300.0,
+    "PRICE_CACHE_MAX_SIZE": 10000,
+    "HTTP_CONNECT_TIMEOUT": 3.05,
+    "HTTP_READ_TIMEOUT": 10.0,
+    "HTTP_MAX_RETRIES": 3,
+    "HTTP_BACKOFF_FACTOR": 0.5,
+    "HTTP_RETRY_AFTER_MAX": 1.0,
+    "JUPITER_POOL_SIZE": 20,
+    "HELIUS_POOL_SIZE": 10,
+    "CIRCUIT_FAILURE_THRESHOLD": 5,
+    "CIRCUIT_RESET_TIMEOUT": 30.0,
+    "JUPITER_RATE_LIMIT": 10.0,
+    "JUPITER_RATE_BURST": 20,
+    "HELIUS_RATE_LIMIT": 10.0,
+    "HELIUS_RATE_BURST": 10,
+    "RATE_LIMIT_RESERVE": 0.25,
+    "RATE_LIMIT_MAX_WAIT": 5.0,
+    "RATE_LIMIT_BACKGROUND_MAX_WAIT": 1.0,
+    "AUTO_SWAP_BATCH_WINDOW": 10.0,
+    "AUTO_SWAP_REPORT_HISTORY": 100,
+    "ACHIEVEMENT_EVENT_LOG": "",
+    "ACHIEVEMENT_POLL_INTERVAL": 0.5,
+    "ASYNC_MAX_CONCURRENCY": 16,
+    "QUOTE_CACHE_TTL": 2.0,
+    "QUOTE_CACHE_MAX_SIZE": 2048,
+    "QUOTE_AMOUNT_BUCKET_BPS": 0,
+    "PRICE_FEED_INTERVAL": 2.0,
+    "QUOTE_LADDER_INTERVAL": 30.0,
+    "QUOTE_LADDER_MAX_AGE": 120.0,
+    "QUOTE_LADDER_RUNGS": 8,
+    "QUOTE_LADDER_MIN_AMOUNT": 0.01,
+    "QUOTE_LADDER_MAX_AMOUNT": 1000.0,
+    "FIRM_QUOTE_TTL": 20.0,
+    "ITEM_CATALOG_PATH": "",
+    "MARKETPLACE_PAGE_SIZE": 12,
+    "TREASURY_DB_PATH": "treasury.db",
+    "TREASURY_PAGE_SIZE": 25,
+    "TREASURY_ANALYTICS_MAX_GUILDS": 32,
+    "PRICE_HISTORY_TICKS": 10000,
+    "CHART_MAX_POINTS": 500,
+    "HELIUS_RPC_URL": "https://mainnet.helius-rpc.com",
+    "HELIUS_PAGE_SIZE": 1000,
+    "WALLET_ASSET_TTL": 60.0,
+    "WALLET_ASSET_CACHE_MAX_WALLETS": 1024,
+    "METRICS_ENABLED": False,
+    "METRICS_FILE": "",
+    "METRICS_PORT": 0,
+    "METRICS_DUMP_INTERVAL": 15.0,
+    "METRICS_SESSION_IDLE": 1800.0,
+    "METRICS_MAX_SESSIONS": 10000,
+    "ADMIN_WALLETS": ""
+}
+
+# Mapping configuration is read from; None means the process environment
+_config_source = None
+
+def set_config_source(source):
+    """Read configuration from ``source`` (any mapping, e.g. st.secrets) from now on"""
+    global _config_source
+    if source is not _config_source:
+        _config_source = source
+        get_config.clear()
+
+def _config_value(default, value):
+    # Environment variables are strings; "false" must not become True
+    if isinstance(default, bool) and isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return type(default)(value)
+
+@shared_resource
+def get_config():
+    """Get configuration, each key falling back to DEFAULT_CONFIG"""
+    source = os.environ if _config_source is None else _config_source
+    try:
+        return {
+            key: _config_value(default, source.get(key, default))
+            for key, default in DEFAULT_CONFIG.items()
+        }
+    except Exception as e:
+        # Return default values if the source is unreadable; front ends decide how
+        # to surface CONFIG_ERROR (jup.py shows it in display_api_status)
+        return dict(DEFAULT_CONFIG, CONFIG_ERROR=str(e))
+
+# Maximum number of mint ids Jupiter accepts in a single /price call
+JUPITER_PRICE_BATCH_SIZE = 100
+
+# Default slippage tolerance for swap quotes (0.5%)
+DEFAULT_SLIPPAGE_BPS = 50
+
+# Mints of the quote tokens used across the app
+TOKEN_MINTS = {
+    "SOL": "So11111111111111111111111111111111111111112",
+    "USDC": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
+    "USDT": "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"
+}
+
+# Demo mints of the in-game reward tokens, like the demo catalog items
+GAME_TOKEN_MINTS = {
+    "GAME": "GAMEMint11111111111111111111111111111111111",
+    "SPEED": "SPEEDMint1111111111111111111111111111111111",
+    "TREASURE": "TREASUREMint1111111111111111111111111111111"
+}
+TOKEN_SYMBOLS = {mint: symbol for symbol, mint in {**TOKEN_MINTS, **GAME_TOKEN_MINTS}.items()}
+
+# Decimals per mint, for converting between token and base-unit amounts
+TOKEN_DECIMALS = {
+    TOKEN_MINTS["SOL"]: 9,
+    TOKEN_MINTS["USDC"]: 6,
+    TOKEN_MINTS["USDT"]: 6,
+    **{mint: 6 for mint in GAME_TOKEN_MINTS.values()}
+}
+
+# Bar resolution (seconds) -> number of bars kept per mint
+BAR_RESOLUTIONS = {
+    60: 1440,       # 1 minute bars for a day
+    300: 2016,      # 5 minute bars for a week
+    3600: 2160,     # hourly bars for 90 days
+    86400: 730      # daily bars for two years
+}
+
+# Records are slotted (no per-instance __dict__) and their low-cardinality
+# string fields are interned, so a large catalog shares one copy of each
+# mint, game, rarity and role string.
+
+@dataclass(frozen=True, slots=True)
+class GameItem:
+    id: str
+    name: str
+    rarity: str
+    token_mint: str
+    price_sol: float
+    description: str
+    game: str
+    
+    def __post_init__(self):
+        for field in ("rarity", "token_mint", "game"):
+            object.__setattr__(self, field, sys.intern(getattr(self, field)))
+
+@dataclass(frozen=True, slots=True)
+class Achievement:
+    id: str
+    name: str
+    description: str
+    token_reward: str
+    reward_amount: float
+    unlocked: bool
+    
+    def __post_init__(self):
+        object.__setattr__(self, "token_reward", sys.intern(self.token_reward))
+
+@dataclass(slots=True)
+class GuildMember:
+    wallet: str
+    role: str
+    contribution_score: int
+    joined_date: str
+    
+    def __post_init__(self):
+        self.role = sys.intern(self.role)
+        self.joined_date = sys.intern(self.joined_date)
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Returned by Metrics.timer when metrics are disabled, so timing costs one flag check
+_NULL_TIMER = nullcontext()
+
+class _Timer:
+    def __init__(self, metrics: "Metrics", name: str, labels: tuple):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and not issubclass(exc_type, Exception):
+            # Control flow such as st.rerun() or st.stop(): neither an error nor a complete render
+            return False
+        self.metrics.observe(self.name, time.perf_counter() - self.started, self.labels)
+        if exc_type is not None:
+            self.metrics.count(self.name.replace("_seconds", "_errors_total"), self.labels)
+        return False
+
+class Metrics:
+    """Process-wide counters, latency histograms and gauges, exportable as Prometheus text"""
+    
+    def __init__(self, enabled: bool = False, buckets: tuple = LATENCY_BUCKETS,
+                 session_idle: float = 1800.0, max_sessions: int = 10000):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.session_idle = session_idle
+        self.max_sessions = max(max_sessions, 1)
+        self.histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self.counters = {}    # (name, labels) -> value
+        self.session_reruns = OrderedDict()  # session id -> [reruns, last seen], least recently seen first
+        self.collectors = []  # callables returning {(name, labels): value} gauges
+        self._lock = threading.Lock()
+    
+    def timer(self, name: str, **labels):
+        """Context manager recording the block's duration (and any exception) under name"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, tuple(sorted(labels.items())))
+    
+    def observe(self, name: str, seconds: float, labels: tuple = ()):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += seconds
+    
+    def count(self, name: str, labels: tuple = (), value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + value
+    
+    def record_rerun(self, session_id: str):
+        if not self.enabled:
+            return
+        self.count("jupy_reruns_total")
+        now = time.time()
+        with self._lock:
+            entry = self.session_reruns.pop(session_id, None) or [0, now]
+            entry[0] += 1
+            entry[1] = now
+            self.session_reruns[session_id] = entry
+            self._prune_sessions(now)
+    
+    def _prune_sessions(self, now: float):
+        # Forget sessions not seen for session_idle; Streamlit gives no signal when one ends
+        while self.session_reruns and (len(self.session_reruns) > self.max_sessions or
+                                       now - next(iter(self.session_reruns.values()))[1] > self.session_idle):
+            self.session_reruns.popitem(last=False)
+    
+    def snapshot(self):
+        """Copies of (histograms, counters, reruns per recently active session) for display"""
+        with self._lock:
+            self._prune_sessions(time.time())
+            return (
+                {key: list(value) for key, value in self.histograms.items()},
+                dict(self.counters),
+                {session_id: reruns for session_id, (reruns, _) in self.session_reruns.items()}
+            )
+    
+    def add_collector(self, collector):
+        with self._lock:
+            self.collectors.append(collector)
+    
+    def gauges(self) -> Dict:
+        with self._lock:
+            self._prune_sessions(time.time())
+            values = {("jupy_active_sessions", ()): len(self.session_reruns)}
+        for collector in list(self.collectors):
+            values.update(collector())
+        return values
+    
+    def quantile(self, histogram: List, q: float) -> float:
+        """Upper bucket bound containing quantile q"""
+        total = sum(histogram[:-1])
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), histogram[:-1]):
+            running += bucket_count
+            if total and running >= q * total:
+                return bound
+        return float("nan")
+    
+    @staticmethod
+    def _labels(labels: tuple, extra: str = "") -> str:
+        parts = [f'{key}="{value}"' for key, value in labels] + ([extra] if extra else [])
+        return "{" + ",".join(parts) + "}" if parts else ""
+    
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        histograms, counters, _ = self.snapshot()
+        lines = []
+        typed = set()
+        for (name, labels), histogram in sorted(histograms.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), histogram[:-1]):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{name}_bucket{self._labels(labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{self._labels(labels)} {histogram[-1]}")
+            lines.append(f"{name}_count{self._labels(labels)} {cumulative}")
+        for kind, values in (("counter", counters), ("gauge", self.gauges())):
+            for (name, labels), value in sorted(values.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} {kind}")
+                    typed.add(name)
+                lines.append(f"{name}{self._labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+    
+    def dump(self, path: str):
+        """Atomically write the Prometheus text to path (e.g. for node_exporter's textfile collector)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+    
+    def start_file_dumper(self, path: str, interval: float):
+        def dump_forever():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.dump(path)
+                except OSError:
+                    pass
+        threading.Thread(target=dump_forever, name="jupy-metrics-dump", daemon=True).start()
+    
+    def start_http_server(self, port: int):
+        """Serve /metrics on localhost for a Prometheus scraper"""
+        metrics = self
+        
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render_prometheus().encode()
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="jupy-metrics-http", daemon=True).start()
+        return server
+
+@shared_resource
+def get_metrics() -> Metrics:
+    """Metrics registry shared by every session in this process"""
+    config = get_config()
+    metrics = Metrics(enabled=config['METRICS_ENABLED'], session_idle=config['METRICS_SESSION_IDLE'],
+                      max_sessions=config['METRICS_MAX_SESSIONS'])
+    if metrics.enabled and config['METRICS_FILE']:
+        metrics.start_file_dumper(config['METRICS_FILE'], config['METRICS_DUMP_INTERVAL'])
+    if metrics.enabled and config['METRICS_PORT']:
+        metrics.start_http_server(config['METRICS_PORT'])
+    return metrics
+
+def instrumented(name: str):
+    """Time a method as jupy_upstream_call_seconds{op=name} using the instance's ``metrics``"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not self.metrics.enabled:
+                return func(self, *args, **kwargs)
+            with self.metrics.timer("jupy_upstream_call_seconds", op=name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+class PriceCache:
+    """Process-wide token price cache with TTL, LRU eviction and stale-while-revalidate"""
+    
+    def __init__(self, ttl: float = 30.0, stale_ttl: float = 300.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # mint -> (price, fetched_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+    
+    def get_many(self, mints: List[str], fetch) -> Dict[str, float]:
+        """Return cached prices, fetching misses inline and refreshing stale entries in the background
+        
+        ``fetch`` takes a list of mints and returns a dict of the prices it could
+        resolve; mints missing from its result are not cached.
+        """
+        now = time.time()
+        prices = {}
+        missing = []
+        stale = []
+        
+        with self._lock:
+            for mint in mints:
+                entry = self._entries.get(mint)
+                age = now - entry[1] if entry else None
+                if entry is None or age >= self.ttl + self.stale_ttl:
+                    missing.append(mint)
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(mint)
+                prices[mint] = entry[0]
+                if age < self.ttl:
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+                    if mint not in self._refreshing:
+                        self._refreshing.add(mint)
+                        stale.append(mint)
+        
+        if stale:
+            threading.Thread(target=self._refresh, args=(stale, fetch), daemon=True).start()
+        
+        if missing:
+            fetched = fetch(missing)
+            self.put_many(fetched)
+            prices.update(fetched)
+        
+        for mint in mints:
+            prices.setdefault(mint, 0.0)
+        return prices
+    
+    def _refresh(self, mints: List[str], fetch):
+        """Re-fetch stale prices without blocking the caller"""
+        try:
+            # A fresh thread starts in the interactive lane; this refresh is background work
+            with request_priority(PRIORITY_BACKGROUND):
+                self.put_many(fetch(mints))
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(mints)
+                self.refreshes += 1
+    
+    def put_many(self, prices: Dict[str, float]):
+        """Store freshly fetched prices, evicting the least recently used past max_size"""
+        now = time.time()
+        with self._lock:
+            for mint, price in prices.items():
+                self._entries[mint] = (price, now)
+                self._entries.move_to_end(mint)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters for sizing the cache under load"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "refreshes": self.refreshes,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0
+            }
+
+@shared_resource
+def get_price_cache() -> PriceCache:
+    """Price cache shared by every session in this process"""
+    config = get_config()
+    cache = PriceCache(
+        ttl=config['PRICE_CACHE_TTL'],
+        stale_ttl=config['PRICE_CACHE_STALE_TTL'],
+        max_size=config['PRICE_CACHE_MAX_SIZE']
+    )
+    get_metrics().add_collector(lambda: {
+        (f"jupy_price_cache_{key}", ()): value for key, value in cache.stats().items()
+    })
+    return cache
+
+class _InFlightCall:
+    """A fetch in progress that followers wait on instead of issuing their own"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+class QuoteCoalescer:
+    """Singleflight plus a short-lived cache for identical swap quote requests"""
+    
+    def __init__(self, ttl: float = 2.0, max_size: int = 2048, amount_bucket_bps: int = 0):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.amount_bucket_bps = amount_bucket_bps
+        self._cache = OrderedDict()  # key -> (quote, fetched_at)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+    
+    def bucket_amount(self, amount: int) -> int:
+        """Snap an amount onto a geometric grid so near-identical requests share a key
+        
+        With ``amount_bucket_bps`` of 0 amounts are used exactly.
+        """
+        if self.amount_bucket_bps <= 0 or amount <= 0:
+            return amount
+        step = 1 + self.amount_bucket_bps / 10000
+        return int(round(step ** round(math.log(amount, step))))
+    
+    def get(self, key: tuple, fetch):
+        """Return a fresh cached quote, join an identical in-flight fetch, or run ``fetch``"""
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and time.time() - cached[1] < self.ttl:
+                self.hits += 1
+                return cached[0]
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlightCall()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            call.done.wait()
+            return call.result
+        
+        try:
+            call.result = fetch()
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if call.result is not None:
+                    self._cache[key] = (call.result, time.time())
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.max_size:
+                        self._cache.popitem(last=False)
+            call.done.set()
+        return call.result
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "in_flight": len(self._inflight),
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses
+            }
+
+@shared_resource
+def get_quote_coalescer() -> QuoteCoalescer:
+    """Quote coalescer shared by every session in this process"""
+    config = get_config()
+    coalescer = QuoteCoalescer(
+        ttl=config['QUOTE_CACHE_TTL'],
+        max_size=config['QUOTE_CACHE_MAX_SIZE'],
+        amount_bucket_bps=config['QUOTE_AMOUNT_BUCKET_BPS']
+    )
+    def quote_gauges():
+        stats = coalescer.stats()
+        lookups = stats["hits"] + stats["coalesced"] + stats["misses"]
+        gauges = {(f"jupy_quote_cache_{key}", ()): value for key, value in stats.items()}
+        gauges[("jupy_quote_cache_hit_ratio", ())] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+        return gauges
+    get_metrics().add_collector(quote_gauges)
+    return coalescer
+
+class UpstreamUnavailableError(Exception):
+    """Raised instead of calling an upstream; callers fall back to cached or static data"""
+
+class CircuitOpenError(UpstreamUnavailableError):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+class RateLimitedError(UpstreamUnavailableError):
+    """Raised when a call would wait too long for its host's rate limit and is shed"""
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures, probing again after a cooldown"""
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False  # a half-open probe is in flight
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+    
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "half-open":
+                # Let a single probe through; others keep failing fast until it succeeds
+                self.opened_at = time.time()
+                self.probing = True
+            return state != "open"
+    
+    def release_probe(self):
+        """Hand back a probe that never reached the host, so the next request can probe at once"""
+        with self._lock:
+            if self.probing and self.opened_at is not None:
+                self.opened_at = time.time() - self.reset_timeout
+            self.probing = False
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            # A failed half-open probe re-opens the circuit for another cooldown
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.time()
+
+# Request priority lanes; interactive calls are served before any background call
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+LANE_NAMES = ("interactive", "background")
+
+_request_priority = ContextVar("jupy_request_priority", default=PRIORITY_INTERACTIVE)
+
+@contextmanager
+def request_priority(priority: int):
+    """Send upstream calls made inside the block (including via asyncio.to_thread) in the given lane"""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+class RateLimiter:
+    """Token bucket for one upstream host with an interactive and a background lane
+    
+    Background calls only take a token when no interactive call is waiting and
+    more than ``reserve`` tokens are left, so a background refresh can never
+    use up the burst the next user click needs. A call whose wait would exceed
+    its lane's max wait is shed with RateLimitedError instead of queuing.
+    """
+    
+    def __init__(self, rate: float, burst: int, reserve: float = 0.0,
+                 max_waits: tuple = (5.0, 1.0)):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        # Tokens background calls must leave in the bucket
+        self.reserve = min(reserve * self.burst, self.burst - 1)
+        self.max_waits = max_waits
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.waiting = [0, 0]  # queue depth per lane
+        self.shed = [0, 0]
+        self._cond = threading.Condition()
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """Take a token, waiting if needed; returns seconds waited or raises RateLimitedError"""
+        started = time.monotonic()
+        deadline = started + self.max_waits[priority]
+        floor = self.reserve if priority == PRIORITY_BACKGROUND else 0.0
+        with self._cond:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    preempted = priority == PRIORITY_BACKGROUND and self.waiting[PRIORITY_INTERACTIVE]
+                    if not preempted and self.tokens - floor >= 1:
+                        self.tokens -= 1
+                        return now - started
+                    # Earliest time this call could be served
+                    ready_at = now + max(floor + 1 - self.tokens, 0) / self.rate
+                    if ready_at > deadline or now >= deadline:
+                        self.shed[priority] += 1
+                        raise RateLimitedError(f"rate limit reached, {LANE_NAMES[priority]} call shed")
+                    # Behind interactive waiters, re-check whenever one of them leaves
+                    self._cond.wait((deadline if preempted else ready_at) - now)
+            finally:
+                self.waiting[priority] -= 1
+                self._cond.notify_all()
+    
+    def throttle(self):
+        """Empty the bucket after the upstream answered 429"""
+        with self._cond:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0)
+    
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "queue_interactive": self.waiting[PRIORITY_INTERACTIVE],
+                "queue_background": self.waiting[PRIORITY_BACKGROUND],
+                "shed_interactive": self.shed[PRIORITY_INTERACTIVE],
+                "shed_background": self.shed[PRIORITY_BACKGROUND]
+            }
+
+class BoundedRetry(Retry):
+    """Retry that gives up instead of sleeping when Retry-After exceeds ``max_retry_after``
+    
+    The response is then returned as-is (raise_on_status=False), so the
+    transport's breaker and rate limiter see the 429/503 and callers fall back
+    at once rather than blocking a script thread for the server's cooldown.
+    """
+    
+    def __init__(self, *args, max_retry_after: float = 1.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+    
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.max_retry_after = self.max_retry_after
+        return retry
+    
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and self.respect_retry_after_header:
+            retry_after = self.get_retry_after(response)
+            if retry_after is not None and retry_after > self.max_retry_after:
+                raise MaxRetryError(_pool, url, reason=None)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+class HttpTransport:
+    """Connection-pooled HTTP session with timeouts, retries and per-host circuit breakers"""
+    
+    # Statuses worth retrying; Retry-After is honored for 429 and 503
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    def __init__(self, config: Dict):
+        self.config = config
+        self.timeout = (config['HTTP_CONNECT_TIMEOUT'], config['HTTP_READ_TIMEOUT'])
+        self.session = requests.Session()
+        self.metrics = get_metrics()
+        self.breakers = {}
+        self.limiters = {}
+        self._lock = threading.Lock()
+        self.mount(config['JUPITER_API_BASE'], config['JUPITER_POOL_SIZE'],
+                   config['JUPITER_RATE_LIMIT'], config['JUPITER_RATE_BURST'])
+        self.mount(config['HELIUS_API_BASE'], config['HELIUS_POOL_SIZE'],
+                   config['HELIUS_RATE_LIMIT'], config['HELIUS_RATE_BURST'])
+        self.mount(config['HELIUS_RPC_URL'], config['HELIUS_POOL_SIZE'],
+                   config['HELIUS_RATE_LIMIT'], config['HELIUS_RATE_BURST'])
+    
+    @staticmethod
+    def _host(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}/"
+    
+    def mount(self, base_url: str, pool_size: int, rate_limit: float = 0.0, rate_burst: int = 1):
+        """Give the host behind base_url its own keep-alive pool and, if rate_limit > 0, a rate limiter"""
+        # A host mounted twice (e.g. a local stub serving every API) keeps its first limiter
+        if rate_limit > 0 and self._host(base_url) not in self.limiters:
+            self.limiters[self._host(base_url)] = RateLimiter(
+                rate_limit,
+                rate_burst,
+                self.config['RATE_LIMIT_RESERVE'],
+                (self.config['RATE_LIMIT_MAX_WAIT'], self.config['RATE_LIMIT_BACKGROUND_MAX_WAIT'])
+            )
+        retry = BoundedRetry(
+            total=self.config['HTTP_MAX_RETRIES'],
+            backoff_factor=self.config['HTTP_BACKOFF_FACTOR'],
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            max_retry_after=self.config['HTTP_RETRY_AFTER_MAX']
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount(self._host(base_url), adapter)
+    
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = self._host(url)
+        with self._lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(
+                    self.config['CIRCUIT_FAILURE_THRESHOLD'],
+                    self.config['CIRCUIT_RESET_TIMEOUT']
+                )
+            return self.breakers[host]
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the shared pool, failing fast while the host's circuit is open"""
+        return self.request("GET", url, **kwargs)
+    
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST through the shared pool; only GETs are retried automatically"""
+        return self.request("POST", url, **kwargs)
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        breaker = self.breaker(url)
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"{self._host(url)} is unavailable, using fallback data")
+        
+        kwargs.setdefault('timeout', self.timeout)
+        host = self._host(url)
+        limiter = self.limiters.get(host)
+        if limiter is not None:
+            try:
+                self._acquire(limiter, host)
+            except RateLimitedError:
+                # A shed call says nothing about the host's health
+                breaker.release_probe()
+                raise
+        try:
+            with self.metrics.timer("jupy_http_request_seconds", host=host):
+                response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        
+        if response.status_code in self.RETRY_STATUSES:
+            breaker.record_failure()
+            self.metrics.count("jupy_http_errors_total", (("host", host), ("status", str(response.status_code))))
+            if response.status_code == 429 and limiter is not None:
+                limiter.throttle()
+        else:
+            breaker.record_success()
+        return response
+    
+    def _acquire(self, limiter: RateLimiter, host: str):
+        priority = _request_priority.get()
+        labels = (("host", host), ("lane", LANE_NAMES[priority]))
+        try:
+            waited = limiter.acquire(priority)
+        except RateLimitedError:
+            self.metrics.count("jupy_rate_limit_shed_total", labels)
+            raise
+        if self.metrics.enabled:
+            self.metrics.observe("jupy_rate_limit_wait_seconds", waited, labels)
+    
+    def limiter_gauges(self) -> Dict:
+        """Queue depth per host and lane, for the metrics registry"""
+        gauges = {}
+        for host, limiter in self.limiters.items():
+            stats = limiter.stats()
+            for lane in LANE_NAMES:
+                gauges[("jupy_rate_limit_queue_depth", (("host", host), ("lane", lane)))] = stats[f"queue_{lane}"]
+        return gauges
+
+@shared_resource
+def get_http_transport() -> HttpTransport:
+    """HTTP transport shared by every session in this process"""
+    transport = HttpTransport(get_config())
+    get_metrics().add_collector(transport.limiter_gauges)
+    return transport
+
+class JupiterAPI:
+    def __init__(self):
+        self.config = get_config()
+        self.http = get_http_transport()
+        self.price_cache = get_price_cache()
+        self.quote_coalescer = get_quote_coalescer()
+        self.metrics = get_metrics()
+    
+    @instrumented("jupiter_get_token_price")
+    def get_token_price(self, mint_address: str) -> float:
+        """Get token price from Jupiter API"""
+        return self.get_token_prices([mint_address]).get(mint_address, 0.0)
+    
+    @instrumented("jupiter_get_token_prices")
+    def get_token_prices(self, mint_addresses: List[str]) -> Dict[str, float]:
+        """Get prices for several tokens, served from the shared price cache where possible"""
+        # Dedupe while keeping order so each mint is looked up once
+        mints = list(dict.fromkeys(mint for mint in mint_addresses if mint))
+        return self.price_cache.get_many(mints, self._fetch_token_prices)
+    
+    def refresh_token_prices(self, mint_addresses: List[str]) -> Dict[str, float]:
+        """Fetch prices from Jupiter now and write them through to the shared cache"""
+        prices = self._fetch_token_prices(list(dict.fromkeys(mint_addresses)))
+        self.price_cache.put_many(prices)
+        return prices
+    
+    def _fetch_token_prices(self, mints: List[str]) -> Dict[str, float]:
+        """Fetch prices from Jupiter using as few /price calls as possible"""
+        prices = {}
+        
+        for start in range(0, len(mints), JUPITER_PRICE_BATCH_SIZE):
+            batch = mints[start:start + JUPITER_PRICE_BATCH_SIZE]
+            try:
+                response = self.http.get(f"{self.config['JUPITER_API_BASE']}/price?ids={','.join(batch)}")
+                if response.status_code == 200:
+                    data = response.json().get('data', {})
+                    for mint in batch:
+                        price = (data.get(mint) or {}).get('price', 0.0)
+                        prices[mint] = float(price or 0.0)
+            except UpstreamUnavailableError:
+                # Upstream is down; callers fall back to static item prices
+                break
+            except Exception as e:
+                logger.error("Error fetching price: %s", e)
+        return prices
+    
+    @instrumented("jupiter_get_swap_quote")
+    def get_swap_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = DEFAULT_SLIPPAGE_BPS):
+        """Get swap quote from Jupiter, sharing identical concurrent requests"""
+        amount = self.quote_coalescer.bucket_amount(amount)
+        key = (input_mint, output_mint, amount, slippage_bps)
+        return self.quote_coalescer.get(key, lambda: self._fetch_swap_quote(*key))
+    
+    def get_firm_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = DEFAULT_SLIPPAGE_BPS):
+        """Quote exactly ``amount`` straight from Jupiter, bypassing the quote cache, for execution"""
+        return self._fetch_swap_quote(input_mint, output_mint, amount, slippage_bps)
+    
+    def _fetch_swap_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int):
+        """Fetch a swap quote from Jupiter"""
+        try:
+            params = {
+                'inputMint': input_mint,
+                'outputMint': output_mint,
+                'amount': amount,
+                'slippageBps': slippage_bps
+            }
+            response = self.http.get(f"{self.config['JUPITER_API_BASE']}/quote", params=params)
+            if response.status_code == 200:
+                return response.json()
+        except UpstreamUnavailableError:
+            pass
+        except Exception as e:
+            logger.error("Error getting swap quote: %s", e)
+        return None
+
+class HeliusAPI:
+    def __init__(self):
+        self.config = get_config()
+        self.api_key = self.config['HELIUS_API_KEY']
+        self.base_url = self.config['HELIUS_API_BASE']
+        self.http = get_http_transport()
+        self.metrics = get_metrics()
+    
+    @instrumented("helius_get_wallet_assets")
+    def get_wallet_assets(self, wallet_address: str):
+        """Get wallet assets using Helius API"""
+        if not self.api_key:
+            logger.warning("Helius API key not configured")
+            return []
+        
+        try:
+            headers = {
+                'Authorization': f'Bearer {self.api_key}',
+                'Content-Type': 'application/json'
+            }
+            response = self.http.get(
+                f"{self.base_url}/addresses/{wallet_address}/balances?api-key={self.api_key}",
+                headers=headers
+            )
+            if response.status_code == 200:
+                return response.json()
+        except UpstreamUnavailableError:
+            pass
+        except Exception as e:
+            logger.error("Error fetching wallet assets: %s", e)
+        return []
+    
+    @instrumented("helius_get_assets_by_owner")
+    def get_assets_by_owner(self, wallet_address: str, page_size: int = 1000) -> Optional[List[Dict]]:
+        """Get every token and NFT a wallet holds via the paginated Helius DAS API
+        
+        Returns None if any page fails, so callers can keep their last snapshot.
+        """
+        if not self.api_key:
+            return []
+        
+        assets = []
+        page = 1
+        try:
+            while True:
+                response = self.http.post(
+                    f"{self.config['HELIUS_RPC_URL']}/?api-key={self.api_key}",
+                    json={
+                        "jsonrpc": "2.0",
+                        "id": "jupy-assets",
+                        "method": "getAssetsByOwner",
+                        "params": {
+                            "ownerAddress": wallet_address,
+                            "page": page,
+                            "limit": page_size,
+                            "displayOptions": {"showFungible": True}
+                        }
+                    }
+                )
+                if response.status_code != 200:
+                    return None
+                items = (response.json().get('result') or {}).get('items', [])
+                assets.extend(items)
+                if len(items) < page_size:
+                    return assets
+                page += 1
+        except UpstreamUnavailableError:
+            pass
+        except Exception as e:
+            logger.error("Error fetching wallet assets: %s", e)
+        return None
+
+def lttb_downsample(x: np.ndarray, y: np.ndarray, max_points: int):
+    """Largest-triangle-three-buckets downsampling that keeps the visual shape of a series"""
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return x, y
+    every = (n - 2) / (max_points - 2)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Pick the point forming the largest triangle with the previous pick and the next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return x[selected], y[selected]
+
+class RingBuffer:
+    """Fixed-capacity columnar ring buffer; oldest rows are overwritten once full"""
+    
+    def __init__(self, capacity: int, columns: Dict[str, str]):
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in columns.items()}
+        self.size = 0
+        self.head = 0  # next write position
+    
+    def append(self, **values):
+        for name, value in values.items():
+            self.columns[name][self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+    
+    def last(self, name: str):
+        return self.columns[name][(self.head - 1) % self.capacity] if self.size else None
+    
+    def set_last(self, name: str, value):
+        self.columns[name][(self.head - 1) % self.capacity] = value
+    
+    def view(self, name: str) -> np.ndarray:
+        """Column in chronological order"""
+        column = self.columns[name]
+        if self.size < self.capacity:
+            return column[:self.size].copy()
+        return np.concatenate([column[self.head:], column[:self.head]])
+
+class PriceHistory:
+    """In-memory price history: raw ticks in a ring buffer, rolled up into OHLC bars as they arrive
+    
+    Every tick updates the current bar at each resolution in BAR_RESOLUTIONS, so
+    bars are always current without recomputing from ticks.
+    """
+    
+    BAR_COLUMNS = {"start": "int64", "open": "float64", "high": "float64", "low": "float64",
+                   "close": "float64"}
+    
+    def __init__(self, tick_capacity: int = 10000, resolutions: Optional[Dict[int, int]] = None):
+        self.tick_capacity = tick_capacity
+        self.resolutions = resolutions or BAR_RESOLUTIONS
+        self.ticks = {}
+        self.bars = {}
+        self._lock = threading.Lock()
+    
+    def _series(self, mint: str):
+        if mint not in self.ticks:
+            self.ticks[mint] = RingBuffer(self.tick_capacity, {"ts": "float64", "price": "float64"})
+            self.bars[mint] = {
+                resolution: RingBuffer(capacity, self.BAR_COLUMNS)
+                for resolution, capacity in self.resolutions.items()
+            }
+        return self.ticks[mint], self.bars[mint]
+    
+    def add_tick(self, mint: str, price: float, ts: Optional[float] = None):
+        """Record a price observation for a mint"""
+        if price is None or price <= 0:
+            return
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            ticks, bars = self._series(mint)
+            ticks.append(ts=ts, price=price)
+            for resolution, ring in bars.items():
+                start = int(ts) - int(ts) % resolution
+                last_start = ring.last("start")
+                if last_start is not None and start < last_start:
+                    continue  # late tick for a closed bar
+                if last_start == start:
+                    ring.set_last("high", max(ring.last("high"), price))
+                    ring.set_last("low", min(ring.last("low"), price))
+                    ring.set_last("close", price)
+                else:
+                    ring.append(start=start, open=price, high=price, low=price, close=price)
+    
+    def add_ticks(self, prices: Dict[str, float], ts: Optional[float] = None):
+        ts = time.time() if ts is None else ts
+        for mint, price in prices.items():
+            self.add_tick(mint, price, ts)
+    
+    def latest_price(self, mint: str) -> Optional[float]:
+        with self._lock:
+            ticks = self.ticks.get(mint)
+            return float(ticks.last("price")) if ticks and ticks.size else None
+    
+    def bars_frame(self, mint: str, resolution: int) -> pd.DataFrame:
+        """OHLC bars for a mint at one resolution, indexed by bar start"""
+        with self._lock:
+            ring = self.bars.get(mint, {}).get(resolution)
+            columns = {name: ring.view(name) for name in self.BAR_COLUMNS} if ring else {}
+        frame = pd.DataFrame(columns or {name: [] for name in self.BAR_COLUMNS})
+        return frame.set_index(pd.to_datetime(frame.pop("start"), unit="s"))
+    
+    def price_at(self, mint: str, ts: float) -> Optional[float]:
+        """Close of the finest bar at or before ts"""
+        with self._lock:
+            for resolution in sorted(self.resolutions):
+                ring = self.bars.get(mint, {}).get(resolution)
+                if not ring or not ring.size:
+                    return None
+                starts = ring.view("start")
+                if starts[0] <= ts:
+                    return float(ring.view("close")[np.searchsorted(starts, ts, side="right") - 1])
+        return None
+    
+    def change(self, mint: str, seconds: float) -> Optional[float]:
+        """Fractional price change over the trailing window"""
+        now, then = self.latest_price(mint), self.price_at(mint, time.time() - seconds)
+        if not now or not then:
+            return None
+        return now / then - 1
+    
+    def close_series(self, mint: str, start: float, end: Optional[float] = None,
+                     max_points: int = 500) -> pd.Series:
+        """Close prices over a range at the finest available resolution, LTTB-downsampled to max_points"""
+        end = time.time() if end is None else end
+        with self._lock:
+            ticks = self.ticks.get(mint)
+            if not ticks or not ticks.size:
+                return pd.Series(dtype=np.float64)
+            tick_ts = ticks.view("ts")
+            if tick_ts[0] <= start or ticks.size < ticks.capacity:
+                x, y = tick_ts, ticks.view("price")
+            else:
+                x = y = None
+                for resolution in sorted(self.resolutions):
+                    ring = self.bars[mint][resolution]
+                    x, y = ring.view("start").astype(np.float64), ring.view("close")
+                    if ring.size and (x[0] <= start or ring.size < ring.capacity):
+                        break
+        window = (x >= start) & (x <= end)
+        x, y = lttb_downsample(x[window], y[window], max_points)
+        return pd.Series(y, index=pd.to_datetime(x, unit="s"))
+
+@shared_resource
+def get_price_history() -> PriceHistory:
+    """Price history shared by every session in this process"""
+    return PriceHistory(get_config()['PRICE_HISTORY_TICKS'])
+
+class PriceFeedWorker:
+    """Background thread that keeps prices for tracked mints fresh in a shared snapshot"""
+    
+    def __init__(self, jupiter_api: JupiterAPI, interval: float = 2.0,
+                 history: Optional[PriceHistory] = None):
+        self.jupiter_api = jupiter_api
+        self.interval = interval
+        self.history = history
+        self.prices = {}
+        self.updated_at = None
+        self._mints = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="jupy-price-feed", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+    
+    def track(self, mints: List[str]):
+        """Add mints to the polling set; new ones are fetched on the next tick"""
+        with self._lock:
+            new_mints = set(mints) - self._mints
+            self._mints.update(new_mints)
+        if new_mints:
+            self._wake.set()
+    
+    def snapshot(self, mints: List[str]) -> Dict[str, float]:
+        """Latest known prices for the given mints, without any I/O"""
+        prices = self.prices
+        return {mint: prices[mint] for mint in mints if mint in prices}
+    
+    def poll(self):
+        with self._lock:
+            mints = list(self._mints)
+        if not mints:
+            return
+        # Background lane: shed under rate-limit pressure rather than delay user calls
+        with request_priority(PRIORITY_BACKGROUND):
+            fetched = self.jupiter_api.refresh_token_prices(mints)
+        if fetched:
+            # Swap in a new dict so readers never see a half-updated snapshot
+            self.prices = {**self.prices, **fetched}
+            self.updated_at = time.time()
+            if self.history is not None:
+                self.history.add_ticks(fetched, self.updated_at)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.poll()
+            except Exception:
+                # Keep serving the last snapshot; the next tick will retry
+                pass
+            self._wake.wait(self.interval)
+
+@shared_resource
+def get_price_feed() -> PriceFeedWorker:
+    """Price feed worker shared by every session in this process"""
+    return PriceFeedWorker(JupiterAPI(), get_config()['PRICE_FEED_INTERVAL'], get_price_history()).start()
+
+@dataclass(slots=True)
+class IndicativeQuote:
+    """Estimate read off a quote ladder; amounts in base units"""
+    in_amount: int
+    out_amount: int
+    price_impact_pct: float
+    age: float                  # seconds since the ladder was quoted
+    stale: bool                 # older than QUOTE_LADDER_MAX_AGE; don't show as a price
+    extrapolated: bool = False  # amount outside the ladder's range; impact is a lower bound
+
+@dataclass
+class QuoteLadder:
+    """Jupiter quotes for one pair at a geometric series of input amounts, smallest first"""
+    input_mint: str
+    output_mint: str
+    amounts: List[int]
+    rates: List[float]    # out / in at each amount
+    impacts: List[float]  # priceImpactPct at each amount
+    updated_at: float
+    
+    def interpolate(self, amount: int, max_age: float) -> IndicativeQuote:
+        """Rate and impact for any amount, linear in amount between the neighbouring rungs"""
+        age = time.time() - self.updated_at
+        position = bisect.bisect_left(self.amounts, amount)
+        if position == 0 or position == len(self.amounts):
+            # Outside the ladder: hold the nearest rung's rate and impact
+            index = min(position, len(self.amounts) - 1)
+            rate, impact = self.rates[index], self.impacts[index]
+            extrapolated = amount != self.amounts[index]
+        else:
+            lo, hi = position - 1, position
+            weight = (amount - self.amounts[lo]) / (self.amounts[hi] - self.amounts[lo])
+            rate = self.rates[lo] + weight * (self.rates[hi] - self.rates[lo])
+            impact = self.impacts[lo] + weight * (self.impacts[hi] - self.impacts[lo])
+            extrapolated = False
+        return IndicativeQuote(amount, int(amount * rate), impact, age, age > max_age, extrapolated)
+
+# Pairs with a background quote ladder: base tokens into each game token
+QUOTE_LADDER_PAIRS = tuple(
+    (TOKEN_MINTS[base], game_mint) for base in ("SOL", "USDC", "USDT") for game_mint in GAME_TOKEN_MINTS.values()
+)
+
+class QuoteLadderWorker:
+    """Background thread that keeps a quote ladder per popular pair fresh
+    
+    Each refresh quotes ``rungs`` input amounts spaced geometrically from
+    ``min_amount`` to ``max_amount`` whole input tokens. Reads never do I/O: a
+    ladder that fails to refresh keeps serving its last quotes, with its age,
+    until it is older than ``max_age`` and is reported stale.
+    """
+    
+    def __init__(self, jupiter_api: JupiterAPI, pairs: tuple = QUOTE_LADDER_PAIRS, rungs: int = 8,
+                 min_amount: float = 0.01, max_amount: float = 1000.0, interval: float = 30.0,
+                 max_age: float = 120.0):
+        self.jupiter_api = jupiter_api
+        self.pairs = tuple(pairs)
+        self.rungs = max(rungs, 2)
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.interval = interval
+        self.max_age = max_age
+        self.ladders = {}  # (input_mint, output_mint) -> QuoteLadder
+        self.refreshes = 0
+        self.failed_rungs = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="jupy-quote-ladders", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+    
+    def rung_amounts(self, input_mint: str) -> List[int]:
+        """Geometric series of input amounts, in base units"""
+        unit = 10 ** TOKEN_DECIMALS.get(input_mint, 0)
+        ratio = (self.max_amount / self.min_amount) ** (1 / (self.rungs - 1))
+        return sorted({max(1, int(self.min_amount * ratio ** i * unit)) for i in range(self.rungs)})
+    
+    def refresh(self, input_mint: str, output_mint: str) -> Optional[QuoteLadder]:
+        amounts, rates, impacts = [], [], []
+        for amount in self.rung_amounts(input_mint):
+            quote = self.jupiter_api.get_swap_quote(input_mint, output_mint, amount)
+            try:
+                in_amount, out_amount = int(quote['inAmount']), int(quote['outAmount'])
+                impact = float(quote.get('priceImpactPct') or 0.0)
+            except (KeyError, TypeError, ValueError):
+                self.failed_rungs += 1
+                continue
+            if in_amount > 0 and (not amounts or in_amount > amounts[-1]):
+                amounts.append(in_amount)
+                rates.append(out_amount / in_amount)
+                impacts.append(impact)
+        if not amounts:
+            return None
+        ladder = QuoteLadder(input_mint, output_mint, amounts, rates, impacts, time.time())
+        self.ladders[(input_mint, output_mint)] = ladder
+        return ladder
+    
+    def indicative(self, input_mint: str, output_mint: str, amount: int) -> Optional[IndicativeQuote]:
+        """Instant estimate from the pair's ladder, without any I/O; None if it has none yet"""
+        ladder = self.ladders.get((input_mint, output_mint))
+        if ladder is None or amount <= 0:
+            return None
+        return ladder.interpolate(amount, self.max_age)
+    
+    def stats(self) -> Dict[str, float]:
+        now = time.time()
+        ages = [now - ladder.updated_at for ladder in list(self.ladders.values())]
+        return {
+            "ladders": len(ages),
+            "stale_ladders": sum(1 for age in ages if age > self.max_age),
+            "max_age_seconds": max(ages, default=0.0),
+            "refreshes": self.refreshes,
+            "failed_rungs": self.failed_rungs,
+        }
+    
+    def _run(self):
+        while not self._stop.is_set():
+            # Background lane: a shed rung just leaves that ladder a little older
+            with request_priority(PRIORITY_BACKGROUND):
+                for input_mint, output_mint in self.pairs:
+                    if self._stop.is_set():
+                        return
+                    try:
+                        self.refresh(input_mint, output_mint)
+                    except Exception as e:
+                        logger.error("Quote ladder refresh failed: %s", e)
+            self.refreshes += 1
+            self._stop.wait(self.interval)
+
+@shared_resource
+def get_quote_ladders() -> QuoteLadderWorker:
+    """Quote ladder worker shared by every session in this process"""
+    config = get_config()
+    worker = QuoteLadderWorker(
+        JupiterAPI(), QUOTE_LADDER_PAIRS, config['QUOTE_LADDER_RUNGS'], config['QUOTE_LADDER_MIN_AMOUNT'],
+        config['QUOTE_LADDER_MAX_AMOUNT'], config['QUOTE_LADDER_INTERVAL'], config['QUOTE_LADDER_MAX_AGE']
+    ).start()
+    get_metrics().add_collector(lambda: {
+        (f"jupy_quote_ladder_{key}", ()): value for key, value in worker.stats().items()
+    })
+    return worker
+
+@shared_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Event loop shared by every session, running on its own daemon thread"""
+    loop = asyncio.new_event_loop()
+    # Blocking upstream calls run on this pool; size it to the concurrency limit
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=get_config()['ASYNC_MAX_CONCURRENCY']))
+    threading.Thread(target=loop.run_forever, name="jupy-event-loop", daemon=True).start()
+    return loop
+
+def run_async(coro, timeout: Optional[float] = None):
+    """Run a coroutine on the shared event loop from synchronous code such as a Streamlit script"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result(timeout)
+
+class AsyncJupiterAPI:
+    """Concurrent fan-out over JupiterAPI, bounded by a semaphore"""
+    
+    def __init__(self, jupiter_api: Optional[JupiterAPI] = None, max_concurrency: Optional[int] = None):
+        self.api = jupiter_api or JupiterAPI()
+        self.semaphore = asyncio.Semaphore(max_concurrency or self.api.config['ASYNC_MAX_CONCURRENCY'])
+    
+    async def _call(self, func, *args):
+        # Calls share the pooled transport, so retries and circuit breaking still apply
+        async with self.semaphore:
+            return await asyncio.to_thread(func, *args)
+    
+    async def get_token_prices(self, mint_addresses: List[str]) -> Dict[str, float]:
+        return await self._call(self.api.get_token_prices, mint_addresses)
+    
+    async def get_swap_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = DEFAULT_SLIPPAGE_BPS):
+        return await self._call(self.api.get_swap_quote, input_mint, output_mint, amount, slippage_bps)
+    
+    async def get_swap_quotes(self, quote_requests: List[tuple]) -> List[Optional[Dict]]:
+        """Quote many (input_mint, output_mint, amount) tuples concurrently, in input order"""
+        return await asyncio.gather(*(self.get_swap_quote(*request) for request in quote_requests))
+
+class AsyncHeliusAPI:
+    """Concurrent fan-out over HeliusAPI, bounded by a semaphore"""
+    
+    def __init__(self, helius_api: Optional[HeliusAPI] = None, max_concurrency: Optional[int] = None):
+        self.api = helius_api or HeliusAPI()
+        self.semaphore = asyncio.Semaphore(max_concurrency or self.api.config['ASYNC_MAX_CONCURRENCY'])
+    
+    async def get_wallet_assets(self, wallet_address: str):
+        async with self.semaphore:
+            return await asyncio.to_thread(self.api.get_wallet_assets, wallet_address)
+    
+    async def get_wallets_assets(self, wallet_addresses: List[str]) -> Dict[str, object]:
+        """Load assets for many wallets concurrently"""
+        wallets = list(dict.fromkeys(wallet_addresses))
+        results = await asyncio.gather(*(self.get_wallet_assets(wallet) for wallet in wallets))
+        return dict(zip(wallets, results))
+
+# DAS interfaces that represent fungible balances rather than individual items
+FUNGIBLE_INTERFACES = ("FungibleToken", "FungibleAsset")
+
+@dataclass
+class WalletSnapshot:
+    wallet: str
+    assets: Dict[str, Dict]
+    fetched_at: float
+    version: int
+    added: List[str]
+    removed: List[str]
+    changed: List[str]
+    
+    @property
+    def items_owned(self) -> int:
+        return sum(1 for asset in self.assets.values() if not asset["fungible"])
+    
+    @property
+    def tokens_held(self) -> int:
+        return sum(1 for asset in self.assets.values() if asset["fungible"])
+
+class _WalletEntry:
+    """A wallet's latest snapshot and the lock serializing its refreshes"""
+    
+    __slots__ = ("lock", "snapshot", "used_at")
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.used_at = time.time()
+
+class WalletAssetCache:
+    """Per-wallet asset snapshots with a TTL, diffed against the previous fetch
+    
+    Entries are kept in least-recently-used order. At most ``max_wallets`` are
+    kept, and wallets idle for longer than the TTL (so their snapshot has
+    expired) are dropped.
+    """
+    
+    def __init__(self, ttl: float = 60.0, page_size: int = 1000, max_wallets: int = 1024):
+        self.ttl = ttl
+        self.page_size = page_size
+        self.max_wallets = max(max_wallets, 1)
+        self._entries = OrderedDict()  # wallet -> _WalletEntry
+        self._lock = threading.Lock()
+    
+    def _entry(self, wallet: str) -> _WalletEntry:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(wallet)
+            if entry is None:
+                entry = self._entries[wallet] = _WalletEntry()
+            else:
+                self._entries.move_to_end(wallet)
+                entry.used_at = now
+            # Least recently used first: stop at the first wallet still in use
+            while len(self._entries) > self.max_wallets or \
+                    now - next(iter(self._entries.values())).used_at > self.ttl:
+                self._entries.popitem(last=False)
+            return entry
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @staticmethod
+    def _normalize(item: Dict) -> Dict:
+        token_info = item.get("token_info") or {}
+        metadata = (item.get("content") or {}).get("metadata") or {}
+        balance = token_info.get("balance")
+        return {
+            "id": item["id"],
+            "name": metadata.get("name") or token_info.get("symbol", ""),
+            "interface": item.get("interface", ""),
+            "fungible": item.get("interface") in FUNGIBLE_INTERFACES,
+            "amount": balance / 10 ** (token_info.get("decimals") or 0) if balance is not None else 1
+        }
+    
+    def get(self, wallet: str, helius_api: HeliusAPI) -> Optional[WalletSnapshot]:
+        """Cached snapshot for a wallet, re-fetched from Helius only once the TTL has passed"""
+        entry = self._entry(wallet)
+        
+        # One refresh per wallet at a time; concurrent callers get its result
+        with entry.lock:
+            previous = entry.snapshot
+            if previous and time.time() - previous.fetched_at < self.ttl:
+                return previous
+            
+            items = helius_api.get_assets_by_owner(wallet, self.page_size)
+            if items is None:
+                return previous
+            
+            assets = {asset["id"]: asset for asset in map(self._normalize, items)}
+            old_assets = previous.assets if previous else {}
+            added = [asset_id for asset_id in assets if asset_id not in old_assets]
+            removed = [asset_id for asset_id in old_assets if asset_id not in assets]
+            changed = [
+                asset_id for asset_id, asset in assets.items()
+                if asset_id in old_assets and old_assets[asset_id]["amount"] != asset["amount"]
+            ]
+            version = previous.version if previous else 0
+            if previous is None or added or removed or changed:
+                version += 1
+            snapshot = WalletSnapshot(wallet, assets, time.time(), version, added, removed, changed)
+            entry.snapshot = snapshot
+            return snapshot
+
+@shared_resource
+def get_wallet_asset_cache() -> WalletAssetCache:
+    """Wallet asset cache shared by every session in this process"""
+    config = get_config()
+    cache = WalletAssetCache(config['WALLET_ASSET_TTL'], config['HELIUS_PAGE_SIZE'],
+                             config['WALLET_ASSET_CACHE_MAX_WALLETS'])
+    get_metrics().add_collector(lambda: {("jupy_wallet_asset_cache_wallets", ()): len(cache)})
+    return cache
+
+# Wallets SolanaWallet can simulate connecting to
+SUPPORTED_WALLETS = ("Phantom", "Solflare", "Backpack")
+
+class SolanaWallet:
+    def __init__(self):
+        self.connected = False
+        self.public_key = None
+        self.balance = 0.0
+    
+    @functools.cached_property
+    def helius_api(self) -> HeliusAPI:
+        # Built on first wallet lookup rather than at session start
+        return HeliusAPI()
+    
+    def connect_wallet(self, wallet_type: str = "Phantom", available_wallets: tuple = SUPPORTED_WALLETS,
+                       public_key: Optional[str] = "Demo_Wallet_Address", balance: float = 5.0):
+        """Simulate wallet connection - In production, use Streamlit JS bridge"""
+        if wallet_type in available_wallets:
+            self.connected = True
+            self.public_key = public_key
+            self.balance = balance
+            return True
+        return False
+    
+    def disconnect_wallet(self):
+        """Disconnect wallet"""
+        self.connected = False
+        self.public_key = None
+        self.balance = 0.0
+    
+    def get_wallet_assets(self):
+        """Get wallet assets from the shared cache, syncing with Helius when stale"""
+        snapshot = self.get_asset_snapshot()
+        return list(snapshot.assets.values()) if snapshot else []
+    
+    def get_asset_snapshot(self) -> Optional[WalletSnapshot]:
+        if self.connected and self.public_key:
+            return get_wallet_asset_cache().get(self.public_key, self.helius_api)
+        return None
+
+@dataclass
+class CatalogPage:
+    items: List[GameItem]
+    total: int
+    offset: int
+    limit: int
+
+class ItemCatalog:
+    """Read-mostly item catalog with secondary indexes for filtered, paginated queries
+    
+    Items are stored in ascending ``price_sol`` order. Each equality index maps a
+    value to the sorted array of positions holding it, so a price range is a
+    ``searchsorted`` slice of any posting list and combined filters only touch the
+    smallest candidate set.
+    """
+    
+    SORTS = ("price_asc", "price_desc", "name")
+    INDEXED_FIELDS = ("game", "rarity", "token_mint")
+    
+    def __init__(self, items: List[GameItem]):
+        self.items = sorted(items, key=lambda item: item.price_sol)
+        self.prices = np.fromiter((item.price_sol for item in self.items), dtype=np.float64, count=len(self.items))
+        self.indexes = {}
+        self.codes = {}
+        for field in self.INDEXED_FIELDS:
+            values = [getattr(item, field) for item in self.items]
+            categories, codes = np.unique(np.array(values, dtype=object), return_inverse=True)
+            codes = codes.astype(np.int32)
+            self.codes[field] = (dict(zip(categories, range(len(categories)))), codes)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+            self.indexes[field] = {
+                value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(categories)
+            }
+        # Positions in name order, for name-sorted pages
+        self.name_order = np.array(sorted(range(len(self.items)), key=lambda i: self.items[i].name), dtype=np.int64)
+    
+    @classmethod
+    def from_file(cls, path: str) -> "ItemCatalog":
+        """Load a catalog from a CSV or JSONL file with one GameItem per row"""
+        with open(path, newline="") as f:
+            if path.endswith(".csv"):
+                rows = csv.DictReader(f)
+            else:
+                rows = (json.loads(line) for line in f if line.strip())
+            items = [
+                GameItem(
+                    str(row["id"]), row["name"], row["rarity"], row["token_mint"],
+                    float(row["price_sol"]), row.get("description", ""), row["game"]
+                )
+                for row in rows
+            ]
+        return cls(items)
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    def values(self, field: str) -> List[str]:
+        """Distinct values of an indexed field"""
+        return sorted(self.indexes[field])
+    
+    def query(self, game: Optional[str] = None, rarity: Optional[str] = None,
+              token_mint: Optional[str] = None, min_price: Optional[float] = None,
+              max_price: Optional[float] = None, sort: str = "price_asc",
+              offset: int = 0, limit: int = 50) -> CatalogPage:
+        """Filter, sort and paginate the catalog"""
+        if sort not in self.SORTS:
+            raise ValueError(f"Unknown sort {sort!r}, expected one of {self.SORTS}")
+        
+        filters = {
+            field: value
+            for field, value in (("game", game), ("rarity", rarity), ("token_mint", token_mint))
+            if value is not None
+        }
+        lo = 0 if min_price is None else int(np.searchsorted(self.prices, min_price, side="left"))
+        hi = len(self.items) if max_price is None else int(np.searchsorted(self.prices, max_price, side="right"))
+        
+        if filters:
+            postings = [self.indexes[field].get(value) for field, value in filters.items()]
+            if any(posting is None for posting in postings):
+                return CatalogPage([], 0, offset, limit)
+            # Drive from the smallest posting list and check the rest by code
+            driver_field = min(filters, key=lambda field: len(self.indexes[field][filters[field]]))
+            candidates = self.indexes[driver_field][filters[driver_field]]
+            candidates = candidates[np.searchsorted(candidates, lo):np.searchsorted(candidates, hi)]
+            for field, value in filters.items():
+                if field != driver_field:
+                    lookup, codes = self.codes[field]
+                    candidates = candidates[codes[candidates] == lookup[value]]
+        else:
+            candidates = np.arange(lo, hi)
+        
+        total = len(candidates)
+        if sort == "price_desc":
+            candidates = candidates[::-1]
+        elif sort == "name":
+            # A linear pass over the name order beats argsorting large candidate sets
+            selected = np.zeros(len(self.items), dtype=bool)
+            selected[candidates] = True
+            candidates = self.name_order[selected[self.name_order]]
+        page = candidates[offset:offset + limit]
+        return CatalogPage([self.items[i] for i in page], total, offset, limit)
+
+DEMO_ITEMS = (
+    GameItem("sword_001", "Legendary Fire Sword", "Legendary", "So11111111111111111111111111111111111111112", 2.5, "A powerful sword that burns enemies", "Fantasy RPG"),
+    GameItem("shield_001", "Diamond Shield", "Epic", "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v", 1.8, "Unbreakable diamond shield", "Fantasy RPG"),
+    GameItem("bow_001", "Elven Longbow", "Rare", "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB", 1.2, "Precise elven craftsmanship", "Fantasy RPG"),
+    GameItem("skin_001", "Cosmic Warrior Skin", "Legendary", "So11111111111111111111111111111111111111112", 3.0, "Exclusive cosmic themed skin", "Battle Arena"),
+    GameItem("car_001", "Speed Demon Vehicle", "Epic", "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v", 2.2, "Fastest car in the racing game", "Racing World"),
+)
+
+ACHIEVEMENTS = (
+    Achievement("ach_001", "First Victory", "Win your first match", "GAME", 10.0, False),
+    Achievement("ach_002", "Speed Demon", "Complete 10 races under 2 minutes", "SPEED", 25.0, False),
+    Achievement("ach_003", "Treasure Hunter", "Find 50 hidden treasures", "TREASURE", 50.0, False),
+    Achievement("ach_004", "Guild Leader", "Lead a guild for 30 days", "LEADER", 100.0, False),
+    Achievement("ach_005", "Master Trader", "Complete 100 item trades", "TRADE", 75.0, False),
+)
+
+@shared_resource
+def get_item_catalog() -> ItemCatalog:
+    """Item catalog shared read-only by every session in this process"""
+    config = get_config()
+    if config['ITEM_CATALOG_PATH']:
+        catalog = ItemCatalog.from_file(config['ITEM_CATALOG_PATH'])
+    else:
+        catalog = ItemCatalog(list(DEMO_ITEMS))
+    get_price_feed().track(catalog.values("token_mint"))
+    return catalog
+
+@dataclass(slots=True)
+class Purchase:
+    item_id: str
+    price_sol: float
+    timestamp: float
+
+class WalletOverlay:
+    """One wallet's changes on top of the shared catalog and achievement definitions"""
+    __slots__ = ("achievements", "purchases", "owned")
+    
+    def __init__(self):
+        self.achievements = {}  # achievement id -> this wallet's copy of the definition
+        self.purchases = []     # Purchase records, oldest first
+        self.owned = {}         # item id -> quantity
+
+# Returned for wallets that have changed nothing, so reads never allocate
+_EMPTY_OVERLAY = WalletOverlay()
+
+class WalletOverlays:
+    """Copy-on-write per-wallet state over process-wide read-only definitions
+    
+    A wallet gets an overlay only when something of its own is written; until
+    then reads see the shared definitions directly. Sessions of the same wallet
+    share its overlay.
+    """
+    
+    def __init__(self):
+        self.overlays = {}  # wallet -> WalletOverlay
+        self._lock = threading.Lock()
+    
+    def get(self, wallet: str) -> WalletOverlay:
+        """The wallet's overlay for reading; shared and empty if it has none"""
+        return self.overlays.get(wallet, _EMPTY_OVERLAY)
+    
+    def unlock(self, wallet: str, achievement: Achievement):
+        with self._lock:
+            overlay = self.overlays.setdefault(wallet, WalletOverlay())
+            if achievement.id not in overlay.achievements:
+                overlay.achievements[achievement.id] = replace(achievement, unlocked=True)
+    
+    def record_purchase(self, wallet: str, item: GameItem, price_sol: float):
+        with self._lock:
+            overlay = self.overlays.setdefault(wallet, WalletOverlay())
+            overlay.purchases.append(Purchase(item.id, price_sol, time.time()))
+            overlay.owned[item.id] = overlay.owned.get(item.id, 0) + 1
+    
+    def purchase_volume(self, wallet: str, start: float, end: Optional[float] = None) -> tuple:
+        """(SOL spent, purchases) by this wallet between start and end"""
+        end = time.time() if end is None else end
+        volume, count = 0.0, 0
+        with self._lock:
+            # Newest first, stopping at the first purchase before the window
+            for purchase in reversed(self.get(wallet).purchases):
+                if purchase.timestamp < start:
+                    break
+                if purchase.timestamp < end:
+                    volume += purchase.price_sol
+                    count += 1
+        return volume, count
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "wallets": len(self.overlays),
+                "purchases": sum(len(overlay.purchases) for overlay in self.overlays.values()),
+            }
+
+@shared_resource
+def get_wallet_overlays() -> WalletOverlays:
+    """Per-wallet overlays shared by every session in this process"""
+    overlays = WalletOverlays()
+    get_metrics().add_collector(lambda: {
+        (f"jupy_wallet_overlay_{key}", ()): value for key, value in overlays.stats().items()
+    })
+    return overlays
+
+class GameItemMarketplace:
+    """A session's view of the shared item catalog; purchases go to the wallet's overlay"""
+    
+    def __init__(self):
+        self.catalog = get_item_catalog()
+        self.items = self.catalog.items
+        self.overlays = get_wallet_overlays()
+        self.jupiter_api = JupiterAPI()
+        self.price_feed = get_price_feed()
+    
+    def get_items_by_game(self, game: str) -> List[GameItem]:
+        return self.catalog.query(game=game, limit=len(self.catalog)).items
+    
+    def search(self, **filters) -> CatalogPage:
+        """Query the catalog; see ItemCatalog.query for the supported filters"""
+        return self.catalog.query(**filters)
+    
+    def record_purchase(self, wallet: str, item: GameItem, price_sol: float):
+        self.overlays.record_purchase(wallet, item, price_sol)
+    
+    def owned_items(self, wallet: str) -> Dict[str, int]:
+        """item id -> quantity bought by this wallet"""
+        return self.overlays.get(wallet).owned
+    
+    def get_real_time_price(self, token_mint: str) -> float:
+        """Get real-time price using Jupiter API"""
+        return self.jupiter_api.get_token_price(token_mint)
+    
+    def get_real_time_prices(self, items: List[GameItem]) -> Dict[str, float]:
+        """Get real-time prices for all given items, preferring the background price feed"""
+        mints = [item.token_mint for item in items]
+        prices = self.price_feed.snapshot(mints)
+        missing = [mint for mint in mints if mint not in prices]
+        if missing:
+            # Not polled yet; fall back to one batched (cached) Jupiter lookup
+            prices.update(self.jupiter_api.get_token_prices(missing))
+        return prices
+
+class AchievementSystem:
+    """A wallet's achievements: the shared definitions with its own unlocks applied"""
+    
+    def __init__(self, wallet: str = ""):
+        self.wallet = wallet
+        self.overlays = get_wallet_overlays()
+    
+    @property
+    def achievements(self) -> List[Achievement]:
+        unlocked = self.overlays.get(self.wallet).achievements
+        return [unlocked.get(achievement.id, achievement) for achievement in ACHIEVEMENTS]
+    
+    def sync(self, engine: "AchievementEngine", player: str):
+        """Switch to ``player`` and unlock every achievement the event stream has unlocked for them"""
+        self.wallet = player
+        unlocked = engine.unlocked_for(player)
+        for achievement in self.achievements:
+            if achievement.id in unlocked and not achievement.unlocked:
+                self.overlays.unlock(player, achievement)
+
+@dataclass(frozen=True)
+class AchievementRule:
+    """How an achievement is earned from game events
+    
+    Counts ``event_type`` events, only those whose ``field`` is below
+    ``max_value`` when a field is given. ``per_day`` counts at most one event
+    per UTC day; ``window`` requires the ``target`` events to fall within that
+    many seconds of each other.
+    """
+    achievement_id: str
+    event_type: str
+    target: int
+    field: str = ""
+    max_value: float = 0.0
+    per_day: bool = False
+    window: float = 0.0
+
+ACHIEVEMENT_RULES = (
+    AchievementRule("ach_001", "match_won", 1),
+    AchievementRule("ach_002", "race_completed", 10, field="duration_s", max_value=120.0),
+    AchievementRule("ach_003", "treasure_found", 50),
+    AchievementRule("ach_004", "guild_led", 30, per_day=True),
+    AchievementRule("ach_005", "item_traded", 100),
+)
+
+class PlayerProgress:
+    """One player's counters: a fixed number of slots per rule, whatever the event volume"""
+    __slots__ = ("counts", "marks", "windows", "unlocked")
+    
+    def __init__(self, rules: tuple):
+        self.counts = [0] * len(rules)
+        self.marks = [None] * len(rules)  # last counted day, for per_day rules
+        # Timestamps of the last ``target`` qualifying events, for windowed rules
+        self.windows = [deque(maxlen=rule.target) if rule.window else None for rule in rules]
+        self.unlocked = 0  # bit i set once rules[i] is met
+
+class AchievementEngine:
+    """Evaluates achievement rules incrementally over a stream of game events
+    
+    Events are dicts with ``player``, ``type``, an optional ``ts`` (epoch
+    seconds, default now) and whatever fields the rules read, e.g.
+    ``{"player": "abc", "type": "race_completed", "duration_s": 95}``. Rules
+    are indexed by event type, so each event costs O(1) regardless of how many
+    players or events came before, and a rule stops being evaluated for a
+    player once it is met.
+    
+    Events come from submit() (a local queue) or, when ``event_log`` is set,
+    from a JSONL file that is replayed in full at start and then followed;
+    other processes can append to the same file.
+    """
+    
+    def __init__(self, rules: tuple = ACHIEVEMENT_RULES, event_log: str = "", poll_interval: float = 0.5):
+        self.rules = tuple(rules)
+        self.event_log = event_log
+        self.poll_interval = poll_interval
+        self.players = {}  # player -> PlayerProgress
+        self.events = 0
+        self.unlocks = 0
+        self.rejected = 0
+        self._rules_by_type = {}
+        for index, rule in enumerate(self.rules):
+            self._rules_by_type.setdefault(rule.event_type, []).append(index)
+        self._queue = queue.SimpleQueue()
+        self._offset = 0  # bytes of event_log already applied
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        # Held while reading the log and advancing _offset, so replay() and the follower never interleave
+        self._read_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="jupy-achievements", daemon=True)
+    
+    def start(self):
+        # Replay before serving reads, so nothing shows as locked while the log catches up
+        if self.event_log:
+            self.replay()
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+    
+    def submit(self, event: dict):
+        """Queue an event for the background consumer
+        
+        With an event log the event is appended to it instead, so the log stays
+        the complete record that replay() rebuilds from.
+        """
+        if not self.event_log:
+            self._queue.put(event)
+            return
+        line = json.dumps(event) + "\n"
+        with self._log_lock, open(self.event_log, "a") as f:
+            f.write(line)
+    
+    def process(self, events) -> List[tuple]:
+        """Apply events synchronously; returns the (player, achievement_id) unlocks they caused"""
+        unlocked = []
+        with self._lock:
+            for event in events:
+                self._apply(event, unlocked)
+        return unlocked
+    
+    def _apply(self, event: dict, unlocked: list):
+        try:
+            indexes = self._rules_by_type.get(event["type"])
+            player = event["player"]
+        except (KeyError, TypeError):
+            self.rejected += 1
+            return
+        self.events += 1
+        if not indexes:
+            return
+        progress = self.players.get(player)
+        if progress is None:
+            progress = self.players[player] = PlayerProgress(self.rules)
+        for index in indexes:
+            if progress.unlocked >> index & 1:
+                continue
+            rule = self.rules[index]
+            if rule.field:
+                value = event.get(rule.field)
+                if not isinstance(value, (int, float)) or value >= rule.max_value:
+                    continue
+            if rule.per_day or rule.window:
+                ts = event.get("ts") or time.time()
+                if rule.per_day:
+                    day = int(ts // 86400)
+                    if progress.marks[index] == day:
+                        continue
+                    progress.marks[index] = day
+                if rule.window:
+                    window = progress.windows[index]
+                    window.append(ts)
+                    met = len(window) == rule.target and window[-1] - window[0] <= rule.window
+                    progress.counts[index] = len(window)
+                else:
+                    progress.counts[index] += 1
+                    met = progress.counts[index] >= rule.target
+            else:
+                progress.counts[index] += 1
+                met = progress.counts[index] >= rule.target
+            if met:
+                progress.unlocked |= 1 << index
+                # Windowed state is no longer needed once the rule is met
+                progress.windows[index] = None
+                self.unlocks += 1
+                unlocked.append((player, rule.achievement_id))
+    
+    def unlocked_for(self, player: str) -> set:
+        progress = self.players.get(player)
+        if progress is None:
+            return set()
+        return {rule.achievement_id for index, rule in enumerate(self.rules) if progress.unlocked >> index & 1}
+    
+    def progress_for(self, player: str) -> Dict[str, tuple]:
+        """achievement_id -> (count, target) for this player"""
+        progress = self.players.get(player)
+        return {
+            rule.achievement_id: (
+                rule.target if progress and progress.unlocked >> index & 1 else (progress.counts[index] if progress else 0),
+                rule.target,
+            )
+            for index, rule in enumerate(self.rules)
+        }
+    
+    def stats(self) -> Dict[str, int]:
+        return {"events": self.events, "unlocks": self.unlocks, "rejected_events": self.rejected,
+                "players": len(self.players), "queued_events": self._queue.qsize()}
+    
+    def reset(self):
+        with self._lock:
+            self.players = {}
+            self.events = self.unlocks = self.rejected = 0
+            self._offset = 0
+    
+    def replay(self, path: Optional[str] = None) -> int:
+        """Rebuild all state from an event log, discarding what was there; returns events applied"""
+        with self._read_lock:
+            self.reset()
+            path = path or self.event_log
+            if not path:
+                return 0
+            self._offset = self._read_log(path, 0)
+            return self.events
+    
+    def _read_log(self, path: str, offset: int) -> int:
+        """Apply complete JSONL lines from ``offset``; returns the offset after the last one"""
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return offset
+        with f:
+            f.seek(offset)
+            batch = []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a writer is mid-line; pick it up on the next poll
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    batch.append(json.loads(line))
+                except ValueError:
+                    with self._lock:
+                        self.rejected += 1
+                if len(batch) >= 10000:
+                    self.process(batch)
+                    batch = []
+            self.process(batch)
+        return offset
+    
+    def _drain(self):
+        batch = []
+        try:
+            while len(batch) < 10000:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if batch:
+            self.process(batch)
+    
+    def _run(self):
+        while True:
+            try:
+                self._drain()
+                if self.event_log:
+                    with self._read_lock:
+                        self._offset = self._read_log(self.event_log, self._offset)
+            except Exception as e:
+                logger.error("Achievement event processing failed: %s", e)
+            if self._stop.is_set():
+                return
+            if self._queue.empty():
+                self._stop.wait(self.poll_interval)
+
+@shared_resource
+def get_achievement_engine() -> AchievementEngine:
+    """Achievement engine shared by every session in this process"""
+    config = get_config()
+    engine = AchievementEngine(ACHIEVEMENT_RULES, config['ACHIEVEMENT_EVENT_LOG'],
+                               config['ACHIEVEMENT_POLL_INTERVAL']).start()
+    get_metrics().add_collector(lambda: {
+        (f"jupy_achievement_{key}", ()): value for key, value in engine.stats().items()
+    })
+    return engine
+
+def allocate_pro_rata(weights: Dict[str, int], total: int) -> Dict[str, int]:
+    """Split integer ``total`` in proportion to ``weights`` so the parts sum exactly to total
+    
+    Largest-remainder rounding: every key gets the floor of its share and the
+    leftover units go to the keys with the largest fractional parts.
+    """
+    weight_sum = sum(weights.values())
+    if not weight_sum or total <= 0:
+        return {key: 0 for key in weights}
+    shares = {key: divmod(weight * total, weight_sum) for key, weight in weights.items()}
+    allocation = {key: quotient for key, (quotient, _) in shares.items()}
+    leftover = total - sum(allocation.values())
+    for key in sorted(shares, key=lambda key: shares[key][1], reverse=True)[:leftover]:
+        allocation[key] += 1
+    return allocation
+
+@dataclass(slots=True)
+class SwapAllocation:
+    """What one player put into and got out of a batch, in base units"""
+    player: str
+    input_mint: str
+    output_mint: str
+    amount_in: int
+    amount_out: int
+
+@dataclass
+class PairExecution:
+    """One swap direction within a batch
+    
+    ``crossed_in`` was matched against players swapping the other way at the
+    reference price, ``swapped_in`` went to Jupiter, and ``amount_out`` is
+    everything delivered to this direction's players.
+    """
+    input_mint: str
+    output_mint: str
+    orders: int
+    amount_in: int
+    crossed_in: int = 0
+    swapped_in: int = 0
+    amount_out: int = 0
+    quote_calls: int = 0
+    error: str = ""
+
+@dataclass
+class AutoSwapBatch:
+    batch_id: int
+    executed_at: float
+    pairs: List[PairExecution]
+    allocations: List[SwapAllocation]
+    requeued: int = 0
+    
+    @property
+    def orders(self) -> int:
+        return sum(pair.orders for pair in self.pairs)
+    
+    @property
+    def quote_calls(self) -> int:
+        return sum(pair.quote_calls for pair in self.pairs)
+
+class AutoSwapEngine:
+    """Collects players' auto-swap orders and executes them in periodic netted batches
+    
+    Orders are summed per (input mint, output mint). At each flush, opposite
+    directions of the same token pair are first crossed against each other at
+    the Jupiter reference price, and only the remainder is quoted, as one swap
+    per direction. Outputs are allocated back to players pro rata. A direction
+    whose quote fails has its orders requeued for the next batch.
+    """
+    
+    def __init__(self, jupiter_api: Optional[JupiterAPI] = None, batch_window: float = 10.0,
+                 report_history: int = 100):
+        self.jupiter_api = jupiter_api or JupiterAPI()
+        self.batch_window = batch_window
+        self.reports = deque(maxlen=report_history)
+        self.pending = {}  # (input_mint, output_mint) -> {player: amount}
+        self.executing = {}  # orders of the batch being executed, same shape
+        self.batches = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="jupy-auto-swap", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+    
+    def submit(self, player: str, input_mint: str, output_mint: str, amount: int):
+        """Queue ``amount`` base units of input_mint to be swapped to output_mint in the next batch"""
+        if amount <= 0 or input_mint == output_mint:
+            return
+        with self._lock:
+            orders = self.pending.setdefault((input_mint, output_mint), {})
+            orders[player] = orders.get(player, 0) + amount
+    
+    def pending_for(self, player: str) -> List[tuple]:
+        """(input_mint, output_mint, amount) this player has queued or in the executing batch"""
+        with self._lock:
+            return [
+                (pair[0], pair[1], orders[player])
+                for queue in (self.executing, self.pending)
+                for pair, orders in queue.items()
+                if player in orders
+            ]
+    
+    def allocations_for(self, player: str) -> List[tuple]:
+        """(batch, allocation) for this player's fills, newest first"""
+        return [
+            (batch, allocation)
+            for batch in reversed(list(self.reports))
+            for allocation in batch.allocations
+            if allocation.player == player
+        ]
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending_orders = sum(len(orders) for orders in self.pending.values())
+        return {"pending_orders": pending_orders, "batches": self.batches}
+    
+    def flush(self) -> Optional[AutoSwapBatch]:
+        """Execute everything queued so far as one batch; None if nothing was queued"""
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            self.executing = pending
+        if not pending:
+            return None
+        
+        try:
+            pairs, allocations, failed = self._execute_batch(pending)
+        except Exception:
+            # Never drop players' rewards: the whole batch goes back in the queue
+            pairs, allocations, failed = [], [], pending
+            raise
+        finally:
+            with self._lock:
+                for pair, orders in failed.items():
+                    queued = self.pending.setdefault(pair, {})
+                    for player, amount in orders.items():
+                        queued[player] = queued.get(player, 0) + amount
+                self.executing = {}
+        
+        with self._lock:
+            self.batches += 1
+            batch = AutoSwapBatch(self.batches, time.time(), pairs, allocations,
+                                  sum(len(orders) for orders in failed.values()))
+        self.reports.append(batch)
+        return batch
+    
+    def _execute_batch(self, pending: Dict[tuple, Dict[str, int]]) -> tuple:
+        """(pair executions, allocations, failed orders by pair) for one batch"""
+        prices = self.jupiter_api.get_token_prices([mint for pair in pending for mint in pair])
+        pairs, allocations, failed = [], [], {}
+        for input_mint, output_mint in sorted(pending):
+            forward = pending[(input_mint, output_mint)]
+            if (output_mint, input_mint) in pending and input_mint > output_mint:
+                continue  # executed with its opposite direction
+            backward = pending.get((output_mint, input_mint), {})
+            executions = self._execute(input_mint, output_mint, forward, backward, prices)
+            for execution, orders in zip(executions, (forward, backward)):
+                if not orders:
+                    continue
+                pairs.append(execution)
+                if execution.error:
+                    failed[(execution.input_mint, execution.output_mint)] = orders
+                    continue
+                for player, amount_out in allocate_pro_rata(orders, execution.amount_out).items():
+                    allocations.append(SwapAllocation(player, execution.input_mint, execution.output_mint,
+                                                      orders[player], amount_out))
+        return pairs, allocations, failed
+    
+    def _reference_rate(self, input_mint: str, output_mint: str, prices: Dict[str, float]) -> Optional[float]:
+        """Output base units per input base unit at Jupiter's reference prices, if known"""
+        input_price, output_price = prices.get(input_mint), prices.get(output_mint)
+        if not input_price or not output_price or input_mint not in TOKEN_DECIMALS or output_mint not in TOKEN_DECIMALS:
+            return None
+        return (input_price / 10 ** TOKEN_DECIMALS[input_mint]) / (output_price / 10 ** TOKEN_DECIMALS[output_mint])
+    
+    def _swap(self, execution: PairExecution, amount: int) -> Optional[int]:
+        """Quote ``amount`` for the execution's direction; output base units or None"""
+        execution.quote_calls += 1
+        quote = self.jupiter_api.get_swap_quote(execution.input_mint, execution.output_mint, amount)
+        if not quote or not int(quote.get('inAmount') or 0):
+            execution.error = "quote failed"
+            return None
+        # Quotes may be shared across nearby amounts (QUOTE_AMOUNT_BUCKET_BPS); scale to ours
+        return int(quote['outAmount']) * amount // int(quote['inAmount'])
+    
+    def _execute(self, input_mint: str, output_mint: str, forward: Dict[str, int],
+                 backward: Dict[str, int], prices: Dict[str, float]) -> tuple:
+        """PairExecutions for both directions of a token pair, crossing them where possible"""
+        ahead = PairExecution(input_mint, output_mint, len(forward), sum(forward.values()))
+        behind = PairExecution(output_mint, input_mint, len(backward), sum(backward.values()))
+        rate = self._reference_rate(input_mint, output_mint, prices) if ahead.amount_in and behind.amount_in else None
+        if rate is None:
+            # Nothing to cross: each direction is one swap
+            for execution in (ahead, behind):
+                if execution.amount_in:
+                    execution.swapped_in = execution.amount_in
+                    execution.amount_out = self._swap(execution, execution.amount_in) or 0
+            return ahead, behind
+        
+        # The larger side (by value) absorbs the smaller one at the reference rate
+        # and only its remainder goes to Jupiter
+        if ahead.amount_in * rate >= behind.amount_in:
+            major, minor, minor_in_major_units = ahead, behind, int(behind.amount_in / rate)
+        else:
+            major, minor, minor_in_major_units = behind, ahead, int(ahead.amount_in * rate)
+        major.crossed_in = min(minor_in_major_units, major.amount_in)
+        minor.crossed_in = minor.amount_in
+        major.swapped_in = major.amount_in - major.crossed_in
+        swapped_out = self._swap(major, major.swapped_in) if major.swapped_in else 0
+        if swapped_out is None:
+            minor.error = major.error
+            return ahead, behind
+        major.amount_out = minor.amount_in + swapped_out
+        minor.amount_out = major.crossed_in
+        return ahead, behind
+    
+    def _run(self):
+        while not self._stop.wait(self.batch_window):
+            try:
+                # Background lane: a shed quote just requeues its orders
+                with request_priority(PRIORITY_BACKGROUND):
+                    self.flush()
+            except Exception as e:
+                logger.error("Auto-swap batch failed: %s", e)
+
+@shared_resource
+def get_auto_swap_engine() -> AutoSwapEngine:
+    """Auto-swap engine shared by every session in this process"""
+    config = get_config()
+    engine = AutoSwapEngine(JupiterAPI(), config['AUTO_SWAP_BATCH_WINDOW'], config['AUTO_SWAP_REPORT_HISTORY']).start()
+    get_metrics().add_collector(lambda: {
+        (f"jupy_auto_swap_{key}", ()): value for key, value in engine.stats().items()
+    })
+    return engine
+
+@dataclass(slots=True)
+class TreasuryResult:
+    """Outcome of one treasury entry"""
+    row_id: Optional[int]    # ledger row, None when the entry was refused
+    balance: float           # guild balance right after this entry
+    duplicate: bool = False  # idempotency key already used; row_id is the original entry
+
+class _PendingEntry:
+    __slots__ = ("guild", "tx_type", "amount", "wallet", "purpose", "min_balance", "key",
+                 "timestamp", "result", "error", "done")
+    
+    def __init__(self, guild, tx_type, amount, wallet, purpose, min_balance, key):
+        self.guild = guild
+        self.tx_type = tx_type
+        self.amount = amount
+        self.wallet = wallet
+        self.purpose = purpose
+        self.min_balance = min_balance
+        self.key = key
+        self.timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        self.result = None
+        self.error = None
+        self.done = False
+
+class TreasuryLedger:
+    """Append-only treasury ledger in SQLite (WAL mode) with per-guild running balances
+    
+    Timestamps are stored as UTC "YYYY-MM-DD HH:MM:SS" strings.
+    
+    Entries are group-committed: callers queue their entry, and whichever
+    caller holds the connection next commits everything queued so far in one
+    transaction. Each entry is applied in its own savepoint with a conditional
+    balance update, so a withdrawal below the floor is refused on its own and
+    concurrent entries can neither overdraw nor lose updates. An entry with an
+    idempotency key is applied at most once per guild.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ledger (
+            id INTEGER PRIMARY KEY,
+            guild TEXT NOT NULL,
+            type TEXT NOT NULL,
+            amount REAL NOT NULL,
+            wallet TEXT,
+            purpose TEXT,
+            timestamp TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ledger_guild_id ON ledger (guild, id);
+        CREATE INDEX IF NOT EXISTS ledger_guild_wallet ON ledger (guild, wallet, id);
+        CREATE INDEX IF NOT EXISTS ledger_guild_type ON ledger (guild, type, id);
+        CREATE INDEX IF NOT EXISTS ledger_guild_timestamp ON ledger (guild, timestamp, id);
+        CREATE TABLE IF NOT EXISTS balances (
+            guild TEXT PRIMARY KEY,
+            balance REAL NOT NULL DEFAULT 0,
+            tx_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            guild TEXT NOT NULL,
+            key TEXT NOT NULL,
+            ledger_id INTEGER NOT NULL,
+            PRIMARY KEY (guild, key)
+        );
+    """
+    
+    def __init__(self, path: str = "treasury.db"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._pending = []  # _PendingEntry objects waiting for the next group commit
+        self._pending_lock = threading.Lock()
+        self.commits = 0
+        self.entries = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+    
+    def submit(self, guild: str, tx_type: str, amount: float, wallet: str, purpose: str = "",
+               min_balance: Optional[float] = None, idempotency_key: Optional[str] = None) -> TreasuryResult:
+        """Append a transaction and apply it to the guild balance atomically
+        
+        Withdrawals pass a negative ``amount`` and ``min_balance`` to refuse
+        entries that would take the balance below it. Blocks until the group
+        commit holding the entry is durable.
+        """
+        entry = _PendingEntry(guild, tx_type, amount, wallet, purpose, min_balance, idempotency_key)
+        with self._pending_lock:
+            self._pending.append(entry)
+        while not entry.done:
+            with self._lock:
+                if entry.done:
+                    break
+                with self._pending_lock:
+                    batch, self._pending = self._pending, []
+                self._commit(batch)
+        if entry.error is not None:
+            raise entry.error
+        return entry.result
+    
+    def append(self, guild: str, tx_type: str, amount: float, wallet: str, purpose: str = "",
+               min_balance: Optional[float] = None, idempotency_key: Optional[str] = None) -> Optional[int]:
+        """submit() returning just the row id, or None when the entry was refused"""
+        return self.submit(guild, tx_type, amount, wallet, purpose, min_balance, idempotency_key).row_id
+    
+    def _commit(self, batch: List[_PendingEntry]):
+        """Apply a batch of entries in one transaction; caller holds self._lock"""
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for entry in batch:
+                self._conn.execute("SAVEPOINT entry")
+                try:
+                    entry.result = self._apply(entry)
+                    self._conn.execute("RELEASE entry")
+                except Exception as e:
+                    self._conn.execute("ROLLBACK TO entry")
+                    self._conn.execute("RELEASE entry")
+                    entry.result, entry.error = None, e
+            self._conn.execute("COMMIT")
+            self.commits += 1
+            self.entries += len(batch)
+        except Exception as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            for entry in batch:
+                entry.result, entry.error = None, e
+        finally:
+            for entry in batch:
+                entry.done = True
+    
+    def _apply(self, entry: _PendingEntry) -> TreasuryResult:
+        execute = self._conn.execute
+        if entry.key is not None:
+            row = execute("SELECT ledger_id FROM idempotency_keys WHERE guild = ? AND key = ?",
+                          (entry.guild, entry.key)).fetchone()
+            if row is not None:
+                return TreasuryResult(row["ledger_id"], self._balance(entry.guild), duplicate=True)
+        execute("INSERT OR IGNORE INTO balances (guild) VALUES (?)", (entry.guild,))
+        updated = execute(
+            "UPDATE balances SET balance = balance + ?, tx_count = tx_count + 1 "
+            "WHERE guild = ? AND (? IS NULL OR balance + ? >= ?)",
+            (entry.amount, entry.guild, entry.min_balance, entry.amount, entry.min_balance)
+        ).rowcount
+        if not updated:
+            return TreasuryResult(None, self._balance(entry.guild))
+        row_id = execute(
+            "INSERT INTO ledger (guild, type, amount, wallet, purpose, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+            (entry.guild, entry.tx_type, abs(entry.amount), entry.wallet, entry.purpose, entry.timestamp)
+        ).lastrowid
+        if entry.key is not None:
+            execute("INSERT INTO idempotency_keys (guild, key, ledger_id) VALUES (?, ?, ?)",
+                    (entry.guild, entry.key, row_id))
+        return TreasuryResult(row_id, self._balance(entry.guild))
+    
+    def _balance(self, guild: str) -> float:
+        row = self._conn.execute("SELECT balance FROM balances WHERE guild = ?", (guild,)).fetchone()
+        return row["balance"] if row else 0.0
+    
+    def import_rows(self, guild: str, rows: List[tuple]) -> int:
+        """Bulk-append historical (type, amount, wallet, purpose, timestamp) rows in one transaction
+        
+        Timestamps are UTC. Amounts are positive; non-deposit rows are subtracted from the balance.
+        Unlike append, no balance floor is enforced.
+        """
+        rows = list(rows)
+        net = sum(amount if tx_type == "Deposit" else -amount for tx_type, amount, *_ in rows)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO ledger (guild, type, amount, wallet, purpose, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(guild, *row) for row in rows]
+                )
+                self._conn.execute("INSERT OR IGNORE INTO balances (guild) VALUES (?)", (guild,))
+                self._conn.execute(
+                    "UPDATE balances SET balance = balance + ?, tx_count = tx_count + ? WHERE guild = ?",
+                    (net, len(rows), guild)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+    
+    def balance(self, guild: str) -> float:
+        with self._lock:
+            return self._balance(guild)
+    
+    def stats(self) -> Dict[str, int]:
+        return {"commits": self.commits, "entries": self.entries}
+    
+    @staticmethod
+    def _where(guild: str, wallet: Optional[str], tx_type: Optional[str],
+               since: Optional[str], until: Optional[str]):
+        clauses, params = ["guild = ?"], [guild]
+        for clause, value in (("wallet = ?", wallet), ("type = ?", tx_type),
+                              ("timestamp >= ?", since), ("timestamp <= ?", until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return " AND ".join(clauses), params
+    
+    def count(self, guild: str, wallet: Optional[str] = None, tx_type: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None) -> int:
+        with self._lock:
+            if wallet is None and tx_type is None and since is None and until is None:
+                # Unfiltered counts come from the running total, not a scan
+                row = self._conn.execute("SELECT tx_count FROM balances WHERE guild = ?", (guild,)).fetchone()
+                return row["tx_count"] if row else 0
+            where, params = self._where(guild, wallet, tx_type, since, until)
+            return self._conn.execute(f"SELECT COUNT(*) FROM ledger WHERE {where}", params).fetchone()[0]
+    
+    def page(self, guild: str, before_id: Optional[int] = None, limit: int = 25, wallet: Optional[str] = None,
+             tx_type: Optional[str] = None, since: Optional[str] = None,
+             until: Optional[str] = None) -> List[Dict]:
+        """Newest-first slice of a guild's transactions with ids below ``before_id`` (all if None)
+        
+        Keyset pagination: pass the last id of one page to get the next, so any
+        page costs an index seek plus ``limit`` rows however deep it is.
+        """
+        where, params = self._where(guild, wallet, tx_type, since, until)
+        if before_id is not None:
+            where += " AND id < ?"
+            params.append(before_id)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, type, amount, wallet, purpose, timestamp FROM ledger "
+                f"WHERE {where} ORDER BY id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def rows_after(self, guild: str, after_id: int = 0, chunk_size: int = 100000):
+        """Yield (id, type, amount, wallet, timestamp) rows newer than after_id, in chunks"""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, type, amount, wallet, timestamp FROM ledger "
+                    "WHERE guild = ? AND id > ? ORDER BY id LIMIT ?",
+                    (guild, after_id, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield [tuple(row) for row in rows]
+            after_id = rows[-1][0]
+
+@shared_resource
+def get_treasury_ledger() -> TreasuryLedger:
+    """Treasury ledger shared by every session in this process"""
+    ledger = TreasuryLedger(get_config()['TREASURY_DB_PATH'])
+    get_metrics().add_collector(lambda: {
+        (f"jupy_treasury_{key}_total", ()): value for key, value in ledger.stats().items()
+    })
+    return ledger
+
+class TreasuryAnalytics:
+    """Columnar (NumPy) view of one guild's transactions with incrementally maintained aggregates
+    
+    Columns grow by doubling so appends are amortized O(1). Per-wallet net
+    contribution and per-day inflow/outflow are updated as rows arrive, so the
+    aggregate queries never rescan the transactions.
+    """
+    
+    SECONDS_PER_DAY = 86400
+    
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.amounts = np.zeros(capacity, dtype=np.float64)  # signed: deposits > 0, withdrawals < 0
+        self.wallet_codes = np.zeros(capacity, dtype=np.int32)
+        self.wallets = []
+        self.wallet_index = {}
+        self.net_by_wallet = np.zeros(0, dtype=np.float64)
+        self.first_day = None
+        self.day_inflow = np.zeros(0, dtype=np.float64)
+        self.day_outflow = np.zeros(0, dtype=np.float64)
+        self.last_id = 0
+        self._lock = threading.Lock()
+        # Held across fetch-and-extend so concurrent syncs never pull the same rows twice
+        self._sync_lock = threading.Lock()
+    
+    def _reserve(self, extra: int):
+        needed = self.size + extra
+        if needed <= len(self.amounts):
+            return
+        capacity = max(needed, 2 * len(self.amounts))
+        for name in ("ids", "timestamps", "amounts", "wallet_codes"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+    
+    def _encode_wallets(self, wallets: List[str]) -> np.ndarray:
+        codes, uniques = pd.factorize(pd.Series(wallets, dtype=object).fillna(""))
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for i, wallet in enumerate(uniques):
+            code = self.wallet_index.get(wallet)
+            if code is None:
+                code = self.wallet_index[wallet] = len(self.wallets)
+                self.wallets.append(wallet)
+            mapping[i] = code
+        if len(self.wallets) > len(self.net_by_wallet):
+            self.net_by_wallet = np.concatenate([
+                self.net_by_wallet, np.zeros(len(self.wallets) - len(self.net_by_wallet))
+            ])
+        return mapping[codes]
+    
+    def _add_days(self, days: np.ndarray, amounts: np.ndarray):
+        lo, hi = int(days.min()), int(days.max())
+        if self.first_day is None:
+            self.first_day = lo
+        if lo < self.first_day:
+            pad = np.zeros(self.first_day - lo)
+            self.day_inflow = np.concatenate([pad, self.day_inflow])
+            self.day_outflow = np.concatenate([pad, self.day_outflow])
+            self.first_day = lo
+        span = hi - self.first_day + 1
+        if span > len(self.day_inflow):
+            pad = np.zeros(span - len(self.day_inflow))
+            self.day_inflow = np.concatenate([self.day_inflow, pad])
+            self.day_outflow = np.concatenate([self.day_outflow, pad])
+        offsets = days - self.first_day
+        self.day_inflow += np.bincount(offsets, weights=np.where(amounts > 0, amounts, 0.0), minlength=span)[:len(self.day_inflow)]
+        self.day_outflow += np.bincount(offsets, weights=np.where(amounts < 0, -amounts, 0.0), minlength=span)[:len(self.day_outflow)]
+    
+    def extend(self, ids, timestamps, amounts, wallets: List[str]):
+        """Append a batch of transactions; timestamps are epoch seconds, amounts signed"""
+        count = len(wallets)
+        if not count:
+            return
+        ids = np.asarray(ids, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        with self._lock:
+            codes = self._encode_wallets(wallets)
+            self._reserve(count)
+            end = self.size + count
+            self.ids[self.size:end] = ids
+            self.timestamps[self.size:end] = timestamps
+            self.amounts[self.size:end] = amounts
+            self.wallet_codes[self.size:end] = codes
+            self.size = end
+            self.net_by_wallet += np.bincount(codes, weights=amounts, minlength=len(self.net_by_wallet))
+            self._add_days(timestamps // self.SECONDS_PER_DAY, amounts)
+            self.last_id = max(self.last_id, int(ids.max()))
+    
+    def sync(self, ledger: TreasuryLedger, guild: str):
+        """Pull ledger rows appended since the last sync"""
+        with self._sync_lock:
+            for rows in ledger.rows_after(guild, self.last_id):
+                ids, types, amounts, wallets, timestamps = zip(*rows)
+                amounts = np.asarray(amounts, dtype=np.float64)
+                amounts[np.asarray(types, dtype=object) != "Deposit"] *= -1
+                epoch = np.asarray(timestamps, dtype="datetime64[s]").astype(np.int64)
+                self.extend(ids, epoch, amounts, list(wallets))
+    
+    def net_contribution(self, wallet: str) -> float:
+        code = self.wallet_index.get(wallet)
+        return float(self.net_by_wallet[code]) if code is not None else 0.0
+    
+    def top_contributors(self, n: int = 10) -> pd.DataFrame:
+        """Wallets with the largest net contribution, best first"""
+        with self._lock:
+            net = self.net_by_wallet.copy()
+        n = min(n, len(net))
+        if not n:
+            return pd.DataFrame(columns=["Wallet", "Net Contribution"])
+        top = np.argpartition(-net, n - 1)[:n]
+        top = top[np.argsort(-net[top], kind="stable")]
+        return pd.DataFrame({
+            "Wallet": [self.wallets[i] for i in top],
+            "Net Contribution": net[top]
+        })
+    
+    def daily_rollup(self, last_days: Optional[int] = None) -> pd.DataFrame:
+        """Inflow, outflow and net per calendar day"""
+        with self._lock:
+            inflow, outflow, first_day = self.day_inflow.copy(), self.day_outflow.copy(), self.first_day
+        if first_day is None:
+            return pd.DataFrame(columns=["Inflow", "Outflow", "Net"])
+        if last_days is not None:
+            first_day += max(0, len(inflow) - last_days)
+            inflow, outflow = inflow[-last_days:], outflow[-last_days:]
+        dates = pd.to_datetime(np.arange(first_day, first_day + len(inflow)), unit="D")
+        return pd.DataFrame({"Inflow": inflow, "Outflow": outflow, "Net": inflow - outflow}, index=dates)
+    
+    def weekly_rollup(self, last_weeks: Optional[int] = None) -> pd.DataFrame:
+        """Inflow, outflow and net per Monday-starting week, derived from the daily rollup"""
+        daily = self.daily_rollup()
+        if daily.empty:
+            return daily
+        weekly = daily.resample("W-MON", label="left", closed="left").sum()
+        return weekly.tail(last_weeks) if last_weeks else weekly
+
+class TreasuryAnalyticsCache:
+    """Per-guild analytics, evicting the least recently used guild past ``max_guilds``
+    
+    Guild names are free text, so instances must not accumulate for every name
+    ever typed. An evicted guild is rebuilt from the ledger on its next sync.
+    """
+    
+    def __init__(self, max_guilds: int = 32):
+        self.max_guilds = max(max_guilds, 1)
+        self._instances = OrderedDict()  # guild -> TreasuryAnalytics
+        self._lock = threading.Lock()
+    
+    def get(self, guild: str) -> TreasuryAnalytics:
+        with self._lock:
+            analytics = self._instances.get(guild)
+            if analytics is None:
+                analytics = self._instances[guild] = TreasuryAnalytics()
+                while len(self._instances) > self.max_guilds:
+                    self._instances.popitem(last=False)
+            else:
+                self._instances.move_to_end(guild)
+            return analytics
+    
+    def __len__(self) -> int:
+        return len(self._instances)
+
+@shared_resource
+def get_treasury_analytics_cache() -> TreasuryAnalyticsCache:
+    """Per-guild analytics cache shared by every session in this process"""
+    return TreasuryAnalyticsCache(get_config()['TREASURY_ANALYTICS_MAX_GUILDS'])
+
+def get_treasury_analytics(guild: str) -> TreasuryAnalytics:
+    """Columnar analytics for one guild, shared by every session in this process"""
+    return get_treasury_analytics_cache().get(guild)
+
+class GuildTreasury:
+    def __init__(self, ledger: Optional[TreasuryLedger] = None):
+        self.guild_name = ""
+        self.members = []
+        self.ledger = ledger or get_treasury_ledger()
+    
+    @property
+    def treasury_balance(self) -> float:
+        return self.ledger.balance(self.guild_name)
+    
+    def add_member(self, wallet: str, role: str = "Member"):
+        member = GuildMember(wallet, role, 0, datetime.now().strftime("%Y-%m-%d"))
+        self.members.append(member)
+    
+    def deposit_to_treasury(self, amount: float, from_wallet: str,
+                            idempotency_key: Optional[str] = None) -> TreasuryResult:
+        return self.ledger.submit(self.guild_name, "Deposit", amount, from_wallet,
+                                  idempotency_key=idempotency_key)
+    
+    def withdraw_from_treasury(self, amount: float, to_wallet: str, purpose: str,
+                               idempotency_key: Optional[str] = None) -> TreasuryResult:
+        """Withdraw unless it would overdraw the treasury; refused withdrawals have no row_id"""
+        return self.ledger.submit(self.guild_name, "Withdrawal", -amount, to_wallet, purpose,
+                                  min_balance=0.0, idempotency_key=idempotency_key)
+    
+    def transaction_count(self, **filters) -> int:
+        return self.ledger.count(self.guild_name, **filters)
+    
+    def get_transactions(self, before_id: Optional[int] = None, limit: int = 25, **filters) -> List[Dict]:
+        """One page of treasury transactions older than before_id, newest first"""
+        return self.ledger.page(self.guild_name, before_id, limit, **filters)
+    
+    @property
+    def analytics(self) -> TreasuryAnalytics:
+        """Columnar analytics for this guild, caught up with the ledger"""
+        analytics = get_treasury_analytics(self.guild_name)
+        analytics.sync(self.ledger, self.guild_name)
+        return analytics
+    
+    def refresh_contributions(self, analytics: Optional[TreasuryAnalytics] = None):
+        """Set each member's contribution score from their net treasury contribution (SOL)
+        
+        Pass analytics already fetched through ``self.analytics`` to skip another ledger sync.
+        """
+        if analytics is None:
+            analytics = self.analytics
+        for member in self.members:
+            member.contribution_score = int(round(analytics.net_contribution(member.wallet)))